@@ -0,0 +1,149 @@
+import threading
+from bisect import bisect_left, insort
+
+from api.cache import bump_version, get_versions
+from reviews.models import Category, Genre, Title
+from reviews.search import normalize
+
+# Вид объекта: модель и поле, по которому объект доступен в API.
+KINDS = {
+    'title': (Title, 'id'),
+    'category': (Category, 'slug'),
+    'genre': (Genre, 'slug'),
+}
+
+
+def suffixes(name):
+    """Нормализованное название с каждого слова, начиная со второго."""
+
+    words = normalize(name).split()
+    return [' '.join(words[start:]) for start in range(1, len(words))]
+
+
+class PrefixIndex:
+    """Поиск названий по префиксу в памяти процесса.
+
+    Два отсортированных массива: полные названия и хвосты названий
+    с каждого следующего слова; совпадения с начала названия идут
+    первыми. Записи в этом процессе применяются к индексу сразу,
+    записи других воркеров видны по версии `scope` в кэше,
+    и тогда индекс перестраивается из БД.
+    """
+
+    def __init__(self, scope, kinds=KINDS):
+        self.kinds = kinds
+        self.scope = scope
+        self.version = None
+        self.names = []
+        self.words = []
+        self.objects = {}
+        self.lock = threading.RLock()
+
+    def entries(self, kind, pk, name):
+        full = [(normalize(name), kind, pk)]
+        return full, [(text, kind, pk) for text in suffixes(name)]
+
+    def add(self, kind, pk, name, public_id):
+        with self.lock:
+            self.remove(kind, pk)
+            full, words = self.entries(kind, pk, name)
+            for entry in full:
+                insort(self.names, entry)
+            for entry in words:
+                insort(self.words, entry)
+            self.objects[kind, pk] = (name, public_id)
+
+    def remove(self, kind, pk):
+        with self.lock:
+            name, _ = self.objects.pop((kind, pk), (None, None))
+            if name is None:
+                return
+            full, words = self.entries(kind, pk, name)
+            for array, removed in ((self.names, full), (self.words, words)):
+                for entry in removed:
+                    position = bisect_left(array, entry)
+                    if position < len(array) and array[position] == entry:
+                        del array[position]
+
+    def rebuild(self, version):
+        with self.lock:
+            self.names, self.words, self.objects = [], [], {}
+            for kind, (model, public_field) in self.kinds.items():
+                for pk, name, public_id in model.objects.values_list(
+                        'pk', 'name', public_field):
+                    self.objects[kind, pk] = (name, public_id)
+                    full, words = self.entries(kind, pk, name)
+                    self.names.extend(full)
+                    self.words.extend(words)
+            self.names.sort()
+            self.words.sort()
+            self.version = version
+
+    def ensure_fresh(self):
+        version, = get_versions(self.scope)
+        if version != self.version:
+            self.rebuild(version)
+
+    def kind_of(self, instance):
+        for kind, (model, _) in self.kinds.items():
+            if isinstance(instance, model):
+                return kind
+        return None
+
+    def invalidate(self):
+        """Сообщение другим воркерам, что названия изменились.
+
+        Возвращает новую версию, если до записи индекс был актуален:
+        тогда после применения записи её можно принять без перестройки.
+        """
+
+        version, = get_versions(self.scope)
+        new_version = bump_version(self.scope)
+        return new_version if version == self.version else None
+
+    def apply(self, instance, pk, deleted=False, expected_version=None):
+        """Изменение объекта из этого процесса без перестройки.
+
+        `pk` передаётся отдельно: после удаления Django обнуляет его
+        у объекта. Версия принимается, только если с момента
+        `invalidate` других записей не было, иначе индекс
+        перестроится из БД.
+        """
+
+        kind = self.kind_of(instance)
+        with self.lock:
+            if self.version is None:
+                return
+            if deleted:
+                self.remove(kind, pk)
+            else:
+                public_field = self.kinds[kind][1]
+                self.add(kind, pk, instance.name,
+                         getattr(instance, public_field))
+            version, = get_versions(self.scope)
+            if expected_version is not None and version == expected_version:
+                self.version = version
+
+    def search(self, prefix, limit=10, kinds=None):
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        found = {}
+        with self.lock:
+            for array in (self.names, self.words):
+                position = bisect_left(array, (prefix,))
+                while len(found) < limit and position < len(array):
+                    text, kind, pk = array[position]
+                    if not text.startswith(prefix):
+                        break
+                    if kinds is None or kind in kinds:
+                        found.setdefault((kind, pk), self.objects[kind, pk])
+                    position += 1
+        return [
+            {'type': kind, 'id': public_id, 'name': name}
+            for (kind, _), (name, public_id) in found.items()
+        ]
+
+
+AUTOCOMPLETE = PrefixIndex('autocomplete')
@@ -0,0 +1,320 @@
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.cache import cache
+
+VERSION_KEY = 'version:{}'
+MODIFIED_KEY = 'modified:{}'
+STATS_KEY = 'stats:{}:{}'
+LOCK_KEY = 'lock:{}'
+MISSING_KEY = 'missing:{}'
+
+MISSING_TIMEOUT = 30
+
+TTL_JITTER = 0.1
+# Устаревшая запись хранится дольше срока, чтобы отдавать её,
+# пока один из вызывающих пересчитывает значение.
+STALE_FACTOR = 2
+LOCK_TIMEOUT = 10
+WAIT_TIMEOUT = 2.0
+POLL_INTERVAL = 0.05
+# Счётчики событий копятся в процессе и переносятся в общий кэш
+# пачкой: каждые STATS_FLUSH_EVENTS событий или STATS_FLUSH_INTERVAL
+# секунд.
+STATS_FLUSH_EVENTS = 100
+STATS_FLUSH_INTERVAL = 10
+
+
+def model_scope(model):
+    """Область версионирования модели — её таблица в БД."""
+
+    return model._meta.db_table
+
+
+def field_scope(model, field):
+    """Область версионирования одного поля модели во всех строках."""
+
+    return f'{model_scope(model)}.{field}'
+
+
+def object_scope(model, pk):
+    """Область версионирования одного объекта и его вложенных ресурсов."""
+
+    return f'{model_scope(model)}:{int(pk)}'
+
+
+def nested_scope(model, pk, parent_pk):
+    """Область объекта, найденного вместе с родителем из URL."""
+
+    return f'{object_scope(model, pk)}@{int(parent_pk)}'
+
+
+def queryset_scopes(queryset, models=()):
+    """Таблицы, от которых зависит результат запроса."""
+
+    scopes = {join.table_name for join in queryset.query.alias_map.values()}
+    scopes.add(model_scope(queryset.model))
+    scopes.update(model_scope(model) for model in models)
+    return tuple(sorted(scopes))
+
+
+def new_version():
+    """Случайная версия вместо счётчика.
+
+    Инкремент в общем кэше не атомарен между воркерами, и две
+    одновременные записи могли бы дать одну и ту же версию.
+    Случайное значение также не совпадёт с прежним, если ключ
+    версии был вытеснен из кэша.
+    """
+
+    return uuid.uuid4().hex
+
+
+def get_versions(*scopes):
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def get_last_modified(*scopes):
+    """Время последней записи в любую из областей.
+
+    Если отметка вытеснена из кэша, временем изменения
+    считается текущий момент.
+    """
+
+    keys = [MODIFIED_KEY.format(scope) for scope in scopes]
+    stamps = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in stamps:
+            cache.add(key, now, timeout=None)
+            stamps[key] = cache.get(key, now)
+    return max(stamps.values(), default=now)
+
+
+def bump_version(scope):
+    version = new_version()
+    cache.set(VERSION_KEY.format(scope), version, timeout=None)
+    cache.set(MODIFIED_KEY.format(scope), time.time(), timeout=None)
+    return version
+
+
+def bump_versions(*scopes):
+    """Новые версии нескольких областей одной пакетной записью."""
+
+    modified = time.time()
+    data = {}
+    for scope in scopes:
+        data[VERSION_KEY.format(scope)] = new_version()
+        data[MODIFIED_KEY.format(scope)] = modified
+    cache.set_many(data, timeout=None)
+
+
+def is_missing(scope):
+    return cache.get(MISSING_KEY.format(scope)) is not None
+
+
+def mark_missing(scope, timeout=MISSING_TIMEOUT):
+    cache.set(MISSING_KEY.format(scope), True, timeout)
+
+
+def forget_missing(*scopes):
+    cache.delete_many([MISSING_KEY.format(scope) for scope in scopes])
+
+
+class EventCounters:
+    """Счётчики событий процесса, переносимые в общий кэш пачками.
+
+    incr общего файлового кэша — чтение и запись файла под блокировкой,
+    и на каждое событие это дороже самого попадания в кэш. Поэтому
+    событие лишь увеличивает счётчик в памяти, а в общий кэш уходит
+    один incr на ключ за пачку. Несброшенные события других процессов
+    в статистике пока не видны, а при аварийном завершении процесса
+    теряются — для доли попаданий это допустимо.
+    """
+
+    def __init__(self, flush_events=STATS_FLUSH_EVENTS,
+                 flush_interval=STATS_FLUSH_INTERVAL):
+        self.flush_events = flush_events
+        self.flush_interval = flush_interval
+        self._counts = Counter()
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        with self._lock:
+            self._counts[key] += 1
+            self._pending += 1
+            due = (self._pending >= self.flush_events
+                   or time.monotonic() - self._flushed_at
+                   >= self.flush_interval)
+            counts = self._take() if due else None
+        if counts:
+            self._write(counts)
+
+    def flush(self):
+        with self._lock:
+            counts = self._take()
+        self._write(counts)
+
+    def _take(self):
+        counts = self._counts
+        self._counts = Counter()
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+        return counts
+
+    @staticmethod
+    def _write(counts):
+        for key, delta in counts.items():
+            while True:
+                try:
+                    cache.incr(key, delta)
+                    break
+                except ValueError:
+                    # Первая пачка: из одновременных add успешен один,
+                    # остальные увеличивают уже созданный счётчик.
+                    if cache.add(key, delta, timeout=None):
+                        break
+
+
+EVENT_COUNTERS = EventCounters()
+
+
+def count_event(name, event):
+    EVENT_COUNTERS.add(STATS_KEY.format(name, event))
+
+
+def flush_events():
+    """Перенос накопленных в процессе событий в общий кэш."""
+
+    EVENT_COUNTERS.flush()
+
+
+def get_hit_stats(names):
+    """Попадания, промахи и доля попаданий по каждому имени."""
+
+    flush_events()
+    keys = [STATS_KEY.format(name, event)
+            for name in names for event in ('hits', 'misses')]
+    values = cache.get_many(keys)
+    stats = {}
+    for name in names:
+        hits = values.get(STATS_KEY.format(name, 'hits'), 0)
+        misses = values.get(STATS_KEY.format(name, 'misses'), 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else None,
+        }
+    return stats
+
+
+def digest(parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def make_key(prefix, *parts):
+    return f'{prefix}:{digest(parts)}'
+
+
+def make_etag(*parts):
+    return f'"{digest(parts)}"'
+
+
+def jittered(timeout, jitter=TTL_JITTER):
+    """Срок со случайным разбросом, чтобы записи не истекали разом."""
+
+    return timeout * random.uniform(1 - jitter, 1 + jitter)
+
+
+def should_refresh(envelope, now, beta=1.0):
+    """Вероятностное досрочное обновление (XFetch).
+
+    Чем ближе срок и чем дольше пересчёт, тем выше вероятность,
+    что очередной вызывающий обновит запись заранее.
+    """
+
+    gap = -envelope['delta'] * beta * math.log(1 - random.random())
+    return now + gap >= envelope['expires']
+
+
+def acquire_lock(key, timeout=LOCK_TIMEOUT):
+    token = uuid.uuid4().hex
+    if cache.add(LOCK_KEY.format(key), token, timeout):
+        return token
+    return None
+
+
+def release_lock(key, token):
+    lock_key = LOCK_KEY.format(key)
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def store(key, compute, timeout):
+    started = time.monotonic()
+    value = compute()
+    if value is not None:
+        ttl = jittered(timeout)
+        envelope = {
+            'value': value,
+            'delta': time.monotonic() - started,
+            'expires': time.time() + ttl,
+        }
+        cache.set(key, envelope, ttl * STALE_FACTOR)
+    return value
+
+
+def get_or_compute(key, compute, timeout, beta=1.0):
+    """Значение из кэша с пересчётом только у одного вызывающего.
+
+    Истёкшую или досрочно обновляемую запись пересчитывает тот,
+    кто взял блокировку, остальные получают прежнее значение.
+    При отсутствии записи остальные ждут её появления не дольше
+    WAIT_TIMEOUT. `compute` может вернуть None — такое значение
+    не кэшируется. Возвращает пару из значения и состояния:
+    hit, stale, refresh или miss.
+    """
+
+    envelope = cache.get(key)
+    if envelope is not None:
+        if not should_refresh(envelope, time.time(), beta):
+            return envelope['value'], 'hit'
+        token = acquire_lock(key)
+        if token is None:
+            return envelope['value'], 'stale'
+        try:
+            return store(key, compute, timeout), 'refresh'
+        finally:
+            release_lock(key, token)
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    token = acquire_lock(key)
+    while token is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        envelope = cache.get(key)
+        if envelope is not None:
+            return envelope['value'], 'hit'
+        token = acquire_lock(key)
+    try:
+        if token is not None:
+            envelope = cache.get(key)
+            if envelope is not None:
+                return envelope['value'], 'hit'
+        return store(key, compute, timeout), 'miss'
+    finally:
+        if token is not None:
+            release_lock(key, token)
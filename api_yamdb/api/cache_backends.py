@@ -0,0 +1,249 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files.move import file_move_safe
+from django.utils.module_loading import import_string
+
+MISSING = object()
+
+DEFAULT_SHARED_BACKEND = 'api.cache_backends.AtomicFileBasedCache'
+INCR_LOCK_TIMEOUT = 5
+INCR_POLL_INTERVAL = 0.001
+
+
+class AtomicFileBasedCache(FileBasedCache):
+    """FileBasedCache с атомарными add и incr для нескольких процессов.
+
+    Файл записи появляется через os.link, который не перезаписывает
+    существующий файл, поэтому из одновременных add успешен один.
+    incr выполняется под блокировкой, взятой через тот же add;
+    блокировка упавшего процесса истекает через INCR_LOCK_TIMEOUT.
+    set_many проверяет размер кэша один раз на весь пакет.
+    """
+
+    def has_key(self, key, version=None):
+        try:
+            return super().has_key(key, version)
+        except FileNotFoundError:
+            # Файл удалён другим процессом между проверкой и открытием,
+            # например снятая блокировка incr.
+            return False
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.has_key(key, version):
+            return False
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        self._cull()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            os.link(tmp_path, fname)
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+        return True
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        # _cull просматривает весь каталог, поэтому пакет проверяет
+        # размер кэша один раз, а не перед каждым файлом.
+        self._createdir()
+        self._cull()
+        for key, value in data.items():
+            self._write(self._key_to_file(key, version), value, timeout)
+        return []
+
+    def _write(self, fname, value, timeout):
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        renamed = False
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            file_move_safe(tmp_path, fname, allow_overwrite=True)
+            renamed = True
+        finally:
+            if not renamed:
+                os.remove(tmp_path)
+
+    def incr(self, key, delta=1, version=None):
+        lock_key = f'{key}:incr-lock'
+        while not self.add(lock_key, True, INCR_LOCK_TIMEOUT, version):
+            time.sleep(INCR_POLL_INTERVAL)
+        try:
+            return super().incr(key, delta, version)
+        finally:
+            self.delete(lock_key, version)
+
+
+class TwoTierCache(BaseCache):
+    """Ограниченный LRU процесса перед общим для всех воркеров кэшем.
+
+    Чтение сначала идёт в локальный слой и только при промахе —
+    в общий бэкенд. Локальная копия живёт не дольше LOCAL_TIMEOUT;
+    для ключей с префиксами из LOCAL_TIMEOUTS срок свой, а 0 значит,
+    что ключ читается только из общего слоя. Согласованность между
+    воркерами держится на ключах версий: данные хранятся под ключами
+    с версией, и после записи в БД читаются уже другие ключи.
+
+    OPTIONS:
+        SHARED_BACKEND — путь к классу общего бэкенда;
+        LOCAL_MAX_ENTRIES — размер локального LRU;
+        LOCAL_TIMEOUT — срок локальной копии в секундах;
+        LOCAL_TIMEOUTS — сроки по префиксам ключей.
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        shared_backend = options.pop('SHARED_BACKEND', DEFAULT_SHARED_BACKEND)
+        self.local_max_entries = int(options.pop('LOCAL_MAX_ENTRIES', 1024))
+        self.local_timeout = options.pop('LOCAL_TIMEOUT', 60)
+        self.local_timeouts = options.pop('LOCAL_TIMEOUTS', {})
+        params = {**params, 'OPTIONS': options}
+        super().__init__(params)
+        self.shared = import_string(shared_backend)(location, params)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_local_timeout(self, key, timeout=DEFAULT_TIMEOUT):
+        local_timeout = self.local_timeout
+        for prefix, prefix_timeout in self.local_timeouts.items():
+            if key.startswith(prefix):
+                local_timeout = prefix_timeout
+                break
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is not None:
+            local_timeout = min(local_timeout, timeout)
+        return local_timeout
+
+    def _local_get(self, local_key):
+        with self._lock:
+            entry = self._local.get(local_key)
+            if entry is None:
+                return MISSING
+            expires, data = entry
+            if expires <= time.monotonic():
+                del self._local[local_key]
+                return MISSING
+            self._local.move_to_end(local_key)
+        # Значение хранится сериализованным, как в LocMemCache, чтобы
+        # изменения полученного объекта не попадали в кэш.
+        return pickle.loads(data)
+
+    def _local_set(self, key, local_key, value, timeout=DEFAULT_TIMEOUT):
+        local_timeout = self.get_local_timeout(key, timeout)
+        if local_timeout <= 0:
+            self._local_delete(local_key)
+            return
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[local_key] = (time.monotonic() + local_timeout, data)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, local_key):
+        with self._lock:
+            self._local.pop(local_key, None)
+
+    def make_and_validate_key(self, key, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        return local_key
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version)
+        value = self._local_get(local_key)
+        if value is MISSING:
+            value = self.shared.get(key, MISSING, version=version)
+            if value is MISSING:
+                return default
+            self._local_set(key, local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missed = []
+        for key in keys:
+            value = self._local_get(self.make_and_validate_key(key, version))
+            if value is MISSING:
+                missed.append(key)
+            else:
+                found[key] = value
+        if missed:
+            shared = self.shared.get_many(missed, version=version)
+            for key, value in shared.items():
+                self._local_set(key, self.make_key(key, version), value)
+            found.update(shared)
+        return found
+
+    def has_key(self, key, version=None):
+        local_key = self.make_and_validate_key(key, version)
+        return (self._local_get(local_key) is not MISSING
+                or self.shared.has_key(key, version=version))
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version)
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(key, local_key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version) or []
+        for key, value in data.items():
+            local_key = self.make_and_validate_key(key, version)
+            if key in failed:
+                self._local_delete(local_key)
+            else:
+                self._local_set(key, local_key, value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version)
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(key, local_key, value, timeout)
+        else:
+            self._local_delete(local_key)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        local_key = self.make_and_validate_key(key, version)
+        try:
+            value = self.shared.incr(key, delta, version=version)
+        except ValueError:
+            self._local_delete(local_key)
+            raise
+        self._local_set(key, local_key, value)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._local_delete(self.make_and_validate_key(key, version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self.make_and_validate_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._local_delete(self.make_and_validate_key(key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
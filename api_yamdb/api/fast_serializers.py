@@ -0,0 +1,167 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import SkipField
+from rest_framework.settings import api_settings
+
+SKIP = object()
+
+# Поля, чьё представление сводится к приведению типа.
+SIMPLE_CONVERTERS = (
+    (serializers.IntegerField, int),
+    (serializers.FloatField, float),
+    (serializers.CharField, str),
+)
+
+
+def is_plain_attribute(model, attr):
+    """Атрибут модели читается простым getattr без вызова."""
+
+    if model is None:
+        return False
+    if isinstance(getattr(model, attr, None), property):
+        return True
+    try:
+        model._meta.get_field(attr)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def simple_converter(field):
+    for field_class, converter in SIMPLE_CONVERTERS:
+        if (isinstance(field, field_class)
+                and type(field).to_representation
+                is field_class.to_representation):
+            return converter
+    return None
+
+
+def datetime_converter(field):
+    """Форматирование даты в ISO 8601 с часовым поясом, найденным заранее."""
+
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if (not isinstance(field, serializers.DateTimeField)
+            or type(field).to_representation
+            is not serializers.DateTimeField.to_representation
+            or output_format is None
+            or output_format.lower() != ISO_8601):
+        return None
+    field_timezone = getattr(field, 'timezone', field.default_timezone())
+    if field_timezone is None:
+        return None
+
+    def convert(value):
+        if isinstance(value, str) or not timezone.is_aware(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def compile_generic(field):
+    """Тот же порядок действий, что в Serializer.to_representation."""
+
+    def represent(instance):
+        try:
+            attribute = field.get_attribute(instance)
+        except SkipField:
+            return SKIP
+        if attribute is None:
+            return None
+        return field.to_representation(attribute)
+    return represent
+
+
+def compile_many(field, attr):
+    represent_item = compile_serializer(field.child)
+
+    def represent(instance):
+        value = getattr(instance, attr)
+        if value is None:
+            return None
+        if isinstance(value, models.Manager):
+            value = value.all()
+        return [represent_item(item) for item in value]
+    return represent
+
+
+def compile_nested(field, attr):
+    represent_nested = compile_serializer(field)
+
+    def represent(instance):
+        value = getattr(instance, attr)
+        return None if value is None else represent_nested(value)
+    return represent
+
+
+def compile_slug(field, attr):
+    slug_field = field.slug_field
+
+    def represent(instance):
+        value = getattr(instance, attr)
+        return None if value is None else getattr(value, slug_field)
+    return represent
+
+
+def compile_value(field, attr):
+    converter = (simple_converter(field)
+                 or datetime_converter(field)
+                 or field.to_representation)
+
+    def represent(instance):
+        value = getattr(instance, attr)
+        return None if value is None else converter(value)
+    return represent
+
+
+def compile_field(field, model):
+    attrs = field.source_attrs
+    if len(attrs) != 1 or not is_plain_attribute(model, attrs[0]):
+        return compile_generic(field)
+    if isinstance(field, serializers.ListSerializer):
+        return compile_many(field, attrs[0])
+    if isinstance(field, serializers.BaseSerializer):
+        return compile_nested(field, attrs[0])
+    if isinstance(field, serializers.SlugRelatedField):
+        return compile_slug(field, attrs[0])
+    return compile_value(field, attrs[0])
+
+
+def compile_serializer(serializer):
+    """Функция представления объекта для уже настроенного сериализатора.
+
+    Поля разбираются один раз, после чего каждый объект обходится
+    готовым списком функций доступа без механики полей DRF.
+    """
+
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    getters = [
+        (field.field_name, compile_field(field, model))
+        for field in serializer._readable_fields
+    ]
+
+    def represent(instance):
+        ret = {}
+        for name, get in getters:
+            value = get(instance)
+            if value is not SKIP:
+                ret[name] = value
+        return ret
+    return represent
+
+
+class FastListSerializer(serializers.ListSerializer):
+    """Сериализация списков через заранее собранные функции доступа.
+
+    Результат совпадает с обычным ListSerializer, но поля
+    разбираются один раз на список, а не для каждого объекта.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        represent = compile_serializer(self.child)
+        return [represent(item) for item in iterable]
@@ -1,18 +1,150 @@
 import django_filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 
-from api_yamdb.reviews.models import Title
+from reviews.models import Comment, Review, Title
+from reviews.search import similar_titles
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """Список значений через запятую."""
 
 
 class TitleFilter(django_filters.FilterSet):
-    """Фильтрация по полям."""
+    """Фильтрация по полям.
+
+    `?genre=` и `?category=` принимают списки слагов через запятую.
+    Жанры по умолчанию объединяются по «или», `?genre_match=all`
+    требует все жанры. Жанры отбираются полусоединением
+    `pk IN (подзапрос)`, а не соединением с промежуточной таблицей,
+    поэтому произведения не дублируются и не завышают `count`.
+    """
+
+    GENRE_MATCH_CHOICES = (('any', 'any'), ('all', 'all'))
 
-    category = django_filters.CharFilter(field_name='category__slug')
-    genre = django_filters.CharFilter(field_name='genre__slug')
     name = django_filters.CharFilter(
-        field_name='name'
-    )
+        field_name='name',
+        lookup_expr='icontains')
+    category = CharInFilter(field_name='category__slug', lookup_expr='in')
+    genre = CharInFilter(method='filter_genre')
+    genre_match = django_filters.ChoiceFilter(
+        choices=GENRE_MATCH_CHOICES, method='filter_genre_match')
     year = django_filters.NumberFilter(field_name='year')
+    year_min = django_filters.NumberFilter(
+        field_name='year', lookup_expr='gte')
+    year_max = django_filters.NumberFilter(
+        field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = ('name', 'category', 'genre', 'year')
+
+    def filter_genre(self, queryset, name, value):
+        slugs = sorted({slug for slug in value if slug})
+        links = Title.genre.through.objects.values('title_id')
+        if self.form.cleaned_data.get('genre_match') != 'all':
+            return queryset.filter(
+                pk__in=links.filter(genre__slug__in=slugs))
+        for slug in slugs:
+            queryset = queryset.filter(pk__in=links.filter(genre__slug=slug))
+        return queryset
+
+    def filter_genre_match(self, queryset, name, value):
+        return queryset
+
+
+class ReviewSearchFilter(django_filters.FilterSet):
+    """Фильтры поиска по отзывам: произведение, автор, даты."""
+
+    title = django_filters.NumberFilter(field_name='title_id')
+    author = django_filters.CharFilter(field_name='author__username')
+    pub_date = django_filters.DateFromToRangeFilter(field_name='pub_date')
+
+    class Meta:
+        model = Review
+        fields = ('title', 'author', 'pub_date')
+
+
+class CommentSearchFilter(django_filters.FilterSet):
+    """Фильтры поиска по комментариям: произведение, отзыв, автор, даты."""
+
+    title = django_filters.NumberFilter(field_name='review__title_id')
+    review = django_filters.NumberFilter(field_name='review_id')
+    author = django_filters.CharFilter(field_name='author__username')
+    pub_date = django_filters.DateFromToRangeFilter(field_name='pub_date')
+
+    class Meta:
+        model = Comment
+        fields = ('title', 'review', 'author', 'pub_date')
+
+
+class StableOrderingFilter(OrderingFilter):
+    """Сортировка с псевдонимами полей и стабильным порядком.
+
+    Псевдонимы задаются во вьюсете атрибутом `ordering_aliases`,
+    последним ключом сортировки всегда добавляется `id`
+    в направлении первого ключа, чтобы запрос шёл по составному индексу.
+    """
+
+    tiebreaker = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        aliases = getattr(view, 'ordering_aliases', {})
+        result = []
+        for term in ordering:
+            descending = term.startswith('-')
+            field = aliases.get(term.lstrip('-'), term.lstrip('-'))
+            result.append(f'-{field}' if descending else field)
+        if not any(term.lstrip('-') in (self.tiebreaker, 'pk')
+                   for term in result):
+            prefix = '-' if result[0].startswith('-') else ''
+            result.append(prefix + self.tiebreaker)
+        return result
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск `?search=` по индексу вьюсета.
+
+    Индекс задаётся атрибутом `search_index`, обязательность
+    параметра — `search_required`. Без явного `?ordering=`
+    результаты сортируются по релевантности, поэтому бэкенд должен
+    стоять после фильтра сортировки.
+    """
+
+    search_param = 'search'
+    ordering_param = OrderingFilter.ordering_param
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            if getattr(view, 'search_required', False):
+                raise ValidationError(
+                    {self.search_param: ['Обязательный параметр.']})
+            return queryset
+        queryset = view.search_index.search(queryset, text)
+        if self.ordering_param not in request.query_params:
+            queryset = queryset.order_by('-search_rank', 'id')
+        return queryset
+
+
+class FuzzyTitleFilter(BaseFilterBackend):
+    """Нечёткий поиск `?fuzzy=` по триграммам названия.
+
+    Находит названия с опечатками; без явного `?ordering=`
+    результаты сортируются по убыванию сходства.
+    """
+
+    search_param = 'fuzzy'
+    ordering_param = OrderingFilter.ordering_param
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        queryset = similar_titles(queryset, text)
+        if self.ordering_param not in request.query_params:
+            queryset = queryset.order_by('-similarity', 'id')
+        return queryset
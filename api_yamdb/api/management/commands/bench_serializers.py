@@ -0,0 +1,89 @@
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleSerializer,)
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает обычную и быструю сериализацию списков '
+            'произведений, отзывов и комментариев.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, rows, repeat, **options):
+        try:
+            with transaction.atomic():
+                self.run(rows, repeat)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_data(self, rows):
+        category = Category.objects.create(name='Кино', slug='bench-films')
+        genres = [
+            Genre.objects.create(name=f'Жанр {number}',
+                                 slug=f'bench-genre-{number}')
+            for number in range(3)
+        ]
+        title = None
+        for number in range(rows):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000,
+                description='Описание ' * 20, category=category)
+            title.genre.set(genres)
+        review = None
+        for number in range(rows):
+            author = User.objects.create(
+                username=f'bench{number}', email=f'bench{number}@yamdb.fake')
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв ' * 20, score=7)
+            Comment.objects.create(
+                review=review, author=author, text='Комментарий ' * 10)
+        return title, review
+
+    def run(self, rows, repeat):
+        title, review = self.create_data(rows)
+        cases = (
+            ('titles', TitleSerializer, list(
+                Title.objects.filter(category__slug='bench-films')
+                .select_related('category').prefetch_related('genre'))),
+            ('reviews', ReviewSerializer, list(
+                Review.objects.filter(title=title).select_related('author'))),
+            ('comments', CommentSerializer, list(
+                Comment.objects.filter(review__title=title)
+                .select_related('author'))),
+        )
+        renderer = JSONRenderer()
+        for name, serializer_class, objects in cases:
+            def standard():
+                return serializers.ListSerializer(
+                    objects, child=serializer_class()).data
+
+            def fast():
+                return serializer_class(objects, many=True).data
+
+            if renderer.render(standard()) != renderer.render(fast()):
+                raise CommandError(f'{name}: результаты сериализации '
+                                   'различаются.')
+            standard_time = timeit.timeit(standard, number=repeat)
+            fast_time = timeit.timeit(fast, number=repeat)
+            total = len(objects) * repeat
+            self.stdout.write(
+                f'{name}: {total / standard_time:.0f} → '
+                f'{total / fast_time:.0f} объектов/с '
+                f'(x{standard_time / fast_time:.1f})')
@@ -0,0 +1,186 @@
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_MIN_SIZE = 200
+DEFAULT_CONTENT_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/',
+)
+
+
+class ZlibCompressor:
+    """Потоковый компрессор zlib с форматом gzip или deflate."""
+
+    def __init__(self, wbits, level=6):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+
+    def __init__(self, quality=4):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+
+    def __init__(self, level=3):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+def available_codecs():
+    """Кодеки в порядке предпочтения сервера: сначала более быстрые."""
+
+    codecs = {}
+    if zstandard is not None:
+        codecs['zstd'] = ZstdCompressor
+    if brotli is not None:
+        codecs['br'] = BrotliCompressor
+    codecs['gzip'] = lambda: ZlibCompressor(16 + zlib.MAX_WBITS)
+    codecs['deflate'] = lambda: ZlibCompressor(zlib.MAX_WBITS)
+    return codecs
+
+
+CODECS = available_codecs()
+
+
+def parse_accept_encoding(header):
+    weights = {}
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.lower()] = weight
+    return weights
+
+
+def negotiate_encoding(header, codecs=CODECS):
+    """Кодек с наибольшим q; при равенстве — по порядку `codecs`."""
+
+    weights = parse_accept_encoding(header)
+    default = weights.get('*', 0.0)
+    best, best_weight = None, 0.0
+    for name in codecs:
+        weight = weights.get(name, default)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def compress_sequence(compressor, sequence):
+    """Сжатие потока по частям без буферизации всего ответа."""
+
+    for chunk in sequence:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов с выбором кодека по заголовку Accept-Encoding.
+
+    Сжимаются только типы из COMPRESSION_CONTENT_TYPES (префиксы
+    с `/` на конце покрывают все подтипы) и ответы не короче
+    COMPRESSION_MIN_SIZE байт; потоковые ответы сжимаются по частям.
+    """
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.min_size = getattr(
+            settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+        self.content_types = tuple(getattr(
+            settings, 'COMPRESSION_CONTENT_TYPES', DEFAULT_CONTENT_TYPES))
+
+    def is_compressible(self, response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        content_type = content_type.strip().lower()
+        return any(
+            content_type.startswith(allowed) if allowed.endswith('/')
+            else content_type == allowed
+            for allowed in self.content_types)
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        if (response.has_header('Content-Encoding')
+                or not self.is_compressible(response)):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressor = CODECS[encoding]()
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                compressor, response.streaming_content)
+            del response['Content-Length']
+        else:
+            content = compressor.compress(response.content)
+            content += compressor.finish()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(response.content))
+
+        # Сжатое представление отличается побайтно, поэтому сильный
+        # ETag становится слабым, как в GZipMiddleware.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
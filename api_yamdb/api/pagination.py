@@ -0,0 +1,335 @@
+import base64
+import datetime
+import json
+from collections import OrderedDict
+from functools import partial, reduce
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import (
+    EmptyPage,
+    InvalidPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,)
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from api.cache import get_versions, make_key, queryset_scopes
+
+MAX_INTEGER = 2 ** 63 - 1
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, берущий общее количество объектов из кэша.
+
+    Ключ включает SQL запроса и версии всех таблиц, от которых
+    он зависит, поэтому любая запись в них делает ключ неактуальным.
+    """
+
+    def __init__(self, *args, scopes=(), timeout=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scopes = scopes
+        self.timeout = timeout
+
+    @cached_property
+    def count(self):
+        sql, params = self.object_list.query.sql_with_params()
+        key = make_key(
+            'count', sql, params, self.scopes, get_versions(*self.scopes))
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.timeout)
+        return count
+
+
+class UncountedPage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class UncountedPaginator(Paginator):
+    """Paginator без COUNT(*).
+
+    Наличие следующей страницы определяется по одной лишней строке.
+    """
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не является целым числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('Страница не содержит результатов')
+        return UncountedPage(
+            rows[:self.per_page], number, self,
+            has_next=len(rows) > self.per_page)
+
+
+class CountOptionalPagination(PageNumberPagination):
+    """Постраничная пагинация с управляемым подсчётом объектов.
+
+    `?count=false` — без COUNT(*), ключ `count` в ответе отсутствует;
+    `?count=cached` — количество из кэша, сбрасываемого при записи.
+    """
+
+    count_query_param = 'count'
+    count_cache_timeout = 60 * 60
+    COUNT_EXACT = 'exact'
+    COUNT_CACHED = 'cached'
+    COUNT_NONE = 'false'
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode in (self.COUNT_CACHED, self.COUNT_NONE):
+            return mode
+        return self.COUNT_EXACT
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = self.get_count_mode(request)
+        if self.count_mode == self.COUNT_CACHED:
+            self.django_paginator_class = partial(
+                CachedCountPaginator,
+                scopes=queryset_scopes(
+                    queryset, getattr(view, 'cache_models', ())),
+                timeout=self.count_cache_timeout)
+        if self.count_mode != self.COUNT_NONE:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        page_number = request.query_params.get(self.page_query_param, 1)
+        try:
+            self.page = UncountedPaginator(queryset, page_size).page(
+                page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)))
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.count_mode != self.COUNT_NONE:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу сортировки (keyset).
+
+    Вместо OFFSET и COUNT(*) следующая страница выбирается условием
+    «строго после последней строки» по составному ключу сортировки,
+    поэтому стоимость страницы не зависит от её глубины.
+    Курсор непрозрачен для клиента: это base64 от сортировки,
+    значений ключа крайней строки и направления обхода.
+    Сортировка берётся из `keyset_ordering` вьюсета либо из queryset
+    после фильтров, так что работает с любой разрешённой `?ordering=`.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    ordering = ('pub_date', 'id')
+    invalid_cursor_message = 'Неверный курсор.'
+    display_page_controls = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        ordering = self.get_ordering(request, queryset, view)
+        values, reverse = self.decode_cursor(request, ordering)
+        if reverse:
+            ordering = [self.invert(term) for term in ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            # Значения курсора приходят от клиента: неподходящий тип
+            # или диапазон для поля — это неверный курсор, а не ошибка
+            # сервера.
+            try:
+                values = self.clean_values(queryset.model, ordering, values)
+                queryset = queryset.filter(self.seek(ordering, values))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            ordering = [self.invert(term) for term in ordering]
+            rows.reverse()
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        self.current_ordering = ordering
+        self.next_position = (
+            self.position(rows[-1], ordering) if has_next and rows else None)
+        self.previous_position = (
+            self.position(rows[0], ordering)
+            if has_previous and rows else None)
+        return rows
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(
+            getattr(view, 'keyset_ordering', None)
+            or queryset.query.order_by
+            or queryset.model._meta.ordering
+            or self.ordering)
+        if not any(term.lstrip('-') in ('id', 'pk') for term in ordering):
+            prefix = '-' if ordering[0].startswith('-') else ''
+            ordering.append(f'{prefix}id')
+        return ordering
+
+    @staticmethod
+    def invert(term):
+        return term[1:] if term.startswith('-') else f'-{term}'
+
+    @staticmethod
+    def seek(ordering, values):
+        """Условие «после строки со значениями ключа `values`».
+
+        Ведущее нестрогое условие по первому ключу позволяет БД выполнить
+        диапазонное сканирование индекса, остальные уточняют позицию.
+        """
+
+        fields = [term.lstrip('-') for term in ordering]
+        descending = [term.startswith('-') for term in ordering]
+        lookups = ['lt' if desc else 'gt' for desc in descending]
+        conditions = []
+        for position, field in enumerate(fields):
+            equal = {fields[i]: values[i] for i in range(position)}
+            conditions.append(Q(
+                **equal, **{f'{field}__{lookups[position]}': values[position]}
+            ))
+        leading = Q(**{
+            f'{fields[0]}__{"lte" if descending[0] else "gte"}': values[0]})
+        return leading & reduce(lambda left, right: left | right, conditions)
+
+    @staticmethod
+    def clean_values(model, ordering, values):
+        """Приведение значений курсора к типам полей модели."""
+
+        cleaned = []
+        for term, value in zip(ordering, values):
+            try:
+                field = model._meta.get_field(term.lstrip('-'))
+            except FieldDoesNotExist:
+                cleaned.append(value)
+                continue
+            value = field.to_python(value)
+            field.run_validators(value)
+            # SQLite не сообщает Django диапазон целых, а значение
+            # шире 64 бит падает уже при выполнении запроса.
+            if isinstance(value, int) and not (
+                    -MAX_INTEGER - 1 <= value <= MAX_INTEGER):
+                raise ValueError(value)
+            cleaned.append(value)
+        return cleaned
+
+    @staticmethod
+    def position(row, ordering):
+        values = []
+        for term in ordering:
+            value = getattr(row, term.lstrip('-'))
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                value = value.isoformat()
+            values.append(value)
+        return values
+
+    def decode_cursor(self, request, ordering):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values, reverse = cursor['v'], bool(cursor['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if (cursor.get('o') != ordering or not isinstance(values, list)
+                or len(values) != len(ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, values, reverse):
+        cursor = json.dumps(
+            {'o': self.current_ordering, 'v': values, 'r': int(reverse)})
+        encoded = base64.urlsafe_b64encode(cursor.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class PageNumberOrCursorPagination(CountOptionalPagination):
+    """Постраничная пагинация с переключением на курсорную.
+
+    Курсорный режим включается параметром `?pagination=cursor`
+    или наличием курсора в запросе; по умолчанию ответ прежний.
+    """
+
+    cursor_class = KeysetPagination
+    mode_query_param = 'pagination'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_class.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = None
+        if self.use_cursor(request):
+            self.cursor = self.cursor_class()
+            self.display_page_controls = False
+            return self.cursor.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
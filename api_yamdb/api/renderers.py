@@ -0,0 +1,67 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Как и JSONRenderer, экранируем символы, недопустимые в строках JavaScript.
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+# В этом диапазоне orjson записывает float так же, как repr(); вне его
+# repr() пишет экспоненту со знаком (1e+16, 1e-05), а orjson — иначе
+# (1e16, 0.00001).
+REPR_FLOAT_MIN = 1e-4
+REPR_FLOAT_MAX = 1e16
+
+
+def has_special_floats(data):
+    """Есть ли в данных float, который orjson запишет не как json.
+
+    Кроме экспоненты это NaN и бесконечности: orjson пишет их как null,
+    а JSONRenderer при STRICT_JSON отказывается их кодировать.
+    """
+
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        cls = value.__class__
+        if cls is str or cls is int or value is None:
+            continue
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float) and value and not (
+                REPR_FLOAT_MIN <= abs(value) < REPR_FLOAT_MAX):
+            return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson с откатом на стандартный json.
+
+    Типы, которых нет в JSON (даты, Decimal, ленивые строки переводов),
+    по-прежнему преобразует encoder_class DRF, поэтому ответ совпадает
+    с JSONRenderer. Отступы, ASCII-вывод, значения, которые orjson
+    не умеет кодировать, и float, которые он записал бы иначе
+    (см. has_special_floats), отдаются стандартной реализации.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (indent is not None or not self.compact
+                or has_special_floats(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(LINE_SEPARATOR, b'\\u2028').replace(
+            PARAGRAPH_SEPARATOR, b'\\u2029')
@@ -2,13 +2,13 @@ import datetime
 
 from rest_framework import serializers
 from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
 
 from reviews.models import (
     Category,
     Comment,
     Genre,
     Review,
+    ScoreHistogram,
     Title, )
 from users.constants import (
     MAX_LEN_EMAIL,
@@ -17,9 +17,22 @@ from users.models import User
 from users.validators import (
     username_validator,
     forbidden_usernames_validator, )
+from .fast_serializers import FastListSerializer
+from .utils import get_requested_fields
 
 
-class UserSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Выбор полей ответа параметрами `?fields=` и `?omit=`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = get_requested_fields(
+            self.context.get('request'), self.fields)
+        for name in set(self.fields) - requested:
+            self.fields.pop(name)
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор пользователей."""
 
     class Meta:
@@ -80,7 +93,7 @@ class UserProfileSerializer(UserSerializer):
     role = serializers.CharField(read_only=True)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для категорий."""
 
     class Meta:
@@ -88,7 +101,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для жанров."""
 
     class Meta:
@@ -96,16 +109,48 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для произведений."""
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
-    rating = serializers.IntegerField(default=0, read_only=True)
+    rating = serializers.IntegerField(
+        source='average_score', read_only=True)
 
     class Meta:
         model = Title
         fields = ('id', 'name', 'year', 'rating',
                   'description', 'genre', 'category')
+        list_serializer_class = FastListSerializer
+
+
+class ScoreHistogramSerializer(serializers.ModelSerializer):
+    """Сериализатор распределения оценок произведения."""
+
+    PERCENTILES = (25, 75, 90)
+
+    scores = serializers.DictField(source='counts', read_only=True)
+    count = serializers.IntegerField(source='total', read_only=True)
+    mean = serializers.FloatField(read_only=True)
+    median = serializers.IntegerField(read_only=True)
+    percentiles = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ScoreHistogram
+        fields = ('scores', 'count', 'mean', 'median', 'percentiles')
+
+    def get_percentiles(self, histogram):
+        return {str(percent): histogram.percentile(percent)
+                for percent in self.PERCENTILES}
+
+
+class TitleDetailSerializer(TitleSerializer):
+    """Сериализатор произведения с распределением оценок."""
+
+    histogram = serializers.DictField(
+        source='histogram.counts', read_only=True)
+
+    class Meta(TitleSerializer.Meta):
+        fields = TitleSerializer.Meta.fields + ('histogram',)
 
 
 class TitleCreateSerializer(TitleSerializer):
@@ -121,7 +166,8 @@ class TitleCreateSerializer(TitleSerializer):
         queryset=Genre.objects.all()
     )
 
-    rating = serializers.IntegerField(default=0, read_only=True)
+    rating = serializers.IntegerField(
+        source='average_score', read_only=True)
 
     class Meta:
         model = Title
@@ -146,7 +192,7 @@ class TitleCreateSerializer(TitleSerializer):
         return serializer.data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для отзывов."""
 
     author = serializers.SlugRelatedField(
@@ -156,19 +202,18 @@ class ReviewSerializer(serializers.ModelSerializer):
     def validate(self, data):
         if self.context.get('request').method == 'POST':
             author = self.context.get('request').user
-            title_id = self.context.get('view').kwargs.get('title_id')
-            title = get_object_or_404(Title, id=title_id)
-            if Review.objects.filter(title_id=title.id,
-                                     author=author).exists():
+            title = self.context.get('view').get_title()
+            if Review.objects.filter(title=title, author=author).exists():
                 raise ValidationError('Можно сделать только один отзыв.')
         return data
 
     class Meta:
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
+        list_serializer_class = FastListSerializer
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для комментариев."""
 
     author = serializers.SlugRelatedField(
@@ -179,3 +224,26 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date')
         read_only_fields = ('id', 'pub_date')
+        list_serializer_class = FastListSerializer
+
+
+class ReviewSearchSerializer(ReviewSerializer):
+    """Отзыв в результатах поиска."""
+
+    title = serializers.IntegerField(source='title_id', read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ('id', 'title', 'text', 'author', 'score', 'pub_date')
+
+
+class CommentSearchSerializer(CommentSerializer):
+    """Комментарий в результатах поиска.
+
+    `title_id` аннотируется во вьюсете, чтобы не загружать отзыв.
+    """
+
+    title = serializers.IntegerField(source='title_id', read_only=True)
+    review = serializers.IntegerField(source='review_id', read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = ('id', 'title', 'review', 'text', 'author', 'pub_date')
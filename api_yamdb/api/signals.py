@@ -0,0 +1,178 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,)
+from django.dispatch import receiver
+
+from api.cache import (
+    bump_versions,
+    field_scope,
+    forget_missing,
+    model_scope,
+    nested_scope,
+    object_scope,)
+from api.autocomplete import AUTOCOMPLETE
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    Review,
+    ScoreHistogram,
+    Title,)
+from users.models import User
+
+TRACKED_APPS = ('reviews', 'users')
+
+# Области, ждущие фиксации транзакции текущего потока: {action: {scope}}.
+_pending = threading.local()
+
+# Записи в эти модели обновляют денормализованные поля других таблиц
+# через QuerySet.update(), который сигналов не отправляет.
+DENORMALIZED = {
+    Review: (Title, ScoreHistogram),
+}
+
+# Объекты, чьё представление меняет запись в модели: произведение
+# вместе со списком его отзывов, отзыв вместе с его комментариями.
+RESOURCES = {
+    Title: lambda title: ((Title, title.pk),),
+    Review: lambda review: (
+        (Title, review.title_id),
+        (Title, getattr(review, '_previous_title_id', None)),
+        (Review, review.pk),
+    ),
+    Comment: lambda comment: ((Review, comment.review_id),),
+}
+
+# Области, отсутствие которых могло быть закэшировано до создания
+# объекта (или переноса отзыва к другому произведению).
+LOOKUP_SCOPES = {
+    Title: lambda title: (object_scope(Title, title.pk),),
+    Review: lambda review: (
+        nested_scope(Review, review.pk, review.title_id),),
+}
+
+
+def after_commit(action, scopes):
+    """Вызов `action(*scopes)` после фиксации транзакции.
+
+    Области копятся до фиксации, и `action` получает каждую один раз,
+    сколько бы строк транзакции её ни затронули. Вне транзакции вызов
+    происходит сразу.
+    """
+
+    actions = getattr(_pending, 'actions', None)
+    if actions is None:
+        actions = _pending.actions = {}
+    actions.setdefault(action, set()).update(scopes)
+    transaction.on_commit(flush_pending)
+
+
+def flush_pending():
+    # Колбэк регистрирует каждая запись: при откате точки сохранения
+    # Django отбрасывает её колбэки, и области должен забрать колбэк
+    # другой записи. Первый выполненный забирает все, остальные пусты.
+    # Области отменённой транзакции уйдут со следующей фиксацией:
+    # лишняя смена версии безопасна, пропущенная — нет.
+    actions = getattr(_pending, 'actions', None) or {}
+    _pending.actions = {}
+    for action, scopes in actions.items():
+        action(*scopes)
+
+
+def resource_scopes(sender, instance):
+    resources = RESOURCES.get(sender)
+    if resources is None:
+        return ()
+    return tuple(object_scope(model, pk)
+                 for model, pk in resources(instance) if pk is not None)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_title(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    instance._previous_title_id = loaded.get('title_id')
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    instance._previous_username = None
+    if instance.pk is None or (
+            update_fields is not None and 'username' not in update_fields):
+        return
+    instance._previous_username = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list('username', flat=True).first())
+
+
+@receiver(post_save, sender=User)
+def bump_username_version(sender, instance, created, **kwargs):
+    # Отзывы и комментарии показывают только имя автора, поэтому
+    # их версии не зависят от остальных полей пользователя.
+    previous = getattr(instance, '_previous_username', None)
+    if not created and previous is not None and (
+            previous != instance.username):
+        after_commit(bump_versions, (field_scope(User, 'username'),))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_model_version(sender, instance, **kwargs):
+    # Версия меняется только после фиксации: иначе запрос между сменой
+    # версии и фиксацией прочитал бы старые строки и закэшировал их
+    # под новой версией до следующей записи.
+    if sender._meta.app_label not in TRACKED_APPS:
+        return
+    scopes = [model_scope(model)
+              for model in (sender, *DENORMALIZED.get(sender, ()))]
+    after_commit(bump_versions, (*scopes, *resource_scopes(sender, instance)))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+def forget_missing_lookups(sender, instance, **kwargs):
+    # До фиксации параллельный запрос ещё не видит объект и снова
+    # запомнил бы его отсутствие.
+    after_commit(forget_missing, LOOKUP_SCOPES[sender](instance))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def update_autocomplete(sender, instance, signal, **kwargs):
+    deleted = signal is post_delete
+    pk = instance.pk
+
+    def apply():
+        # Новая версия публикуется только после фиксации, иначе другой
+        # воркер перестроил бы индекс по ещё не изменённым строкам.
+        expected_version = AUTOCOMPLETE.invalidate()
+        AUTOCOMPLETE.apply(
+            instance, pk, deleted=deleted, expected_version=expected_version)
+
+    transaction.on_commit(apply)
+
+
+@receiver(m2m_changed)
+def bump_relation_version(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    if not action.startswith('post_'):
+        return
+    scopes = [model_scope(sender)]
+    if sender is Title.genre.through:
+        if not reverse:
+            scopes.append(object_scope(Title, instance.pk))
+        elif pk_set:
+            scopes.extend(object_scope(Title, pk) for pk in pk_set)
+        else:
+            # Очистка жанра без списка произведений: меняется таблица
+            # жанров, от которой зависит страница любого произведения.
+            scopes.append(model_scope(type(instance)))
+    after_commit(bump_versions, scopes)
@@ -2,9 +2,14 @@ from django.urls import include, path
 from rest_framework import routers
 
 from api.views import (
+    AutocompleteView,
+    CacheStatsView,
     CategoryViewSet,
+    CommentSearchViewSet,
     CommentViewSet,
     GenreViewSet,
+    ResponseCacheMixin,
+    ReviewSearchViewSet,
     ReviewViewSet,
     SignUpViewSet,
     TitleViewSet,
@@ -25,6 +30,10 @@ router1.register(
     r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet,
     basename='comments')
+router1.register(
+    'search/reviews', ReviewSearchViewSet, basename='search-reviews')
+router1.register(
+    'search/comments', CommentSearchViewSet, basename='search-comments')
 
 urlpatterns = [
     path('v1/', include(router1.urls)),
@@ -36,4 +45,14 @@ urlpatterns = [
         'v1/auth/token/',
         TokenViewSet.as_view({'post': 'create'}),
         name='token'),
+    path(
+        'v1/autocomplete/',
+        AutocompleteView.as_view(),
+        name='autocomplete'),
+    path(
+        'v1/cache/stats/',
+        CacheStatsView.as_view(basenames=tuple(
+            basename for _, viewset, basename in router1.registry
+            if issubclass(viewset, ResponseCacheMixin))),
+        name='cache-stats'),
 ]
@@ -1,4 +1,5 @@
 from django.contrib.auth.tokens import default_token_generator
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from users.models import User
@@ -16,3 +17,22 @@ def send_confirmation_code(user: User) -> str:
 def get_token_for_user(user):
     refresh = RefreshToken.for_user(user)
     return {"token": str(refresh.access_token)}
+
+
+def get_requested_fields(request, fields):
+    """Поля ответа с учётом параметров `?fields=` и `?omit=`.
+
+    Параметры действуют только для безопасных методов,
+    неизвестные имена полей игнорируются.
+    """
+
+    fields = set(fields)
+    if request is None or request.method not in SAFE_METHODS:
+        return fields
+    selected = request.query_params.get('fields')
+    if selected:
+        fields &= {name.strip() for name in selected.split(',')}
+    omitted = request.query_params.get('omit')
+    if omitted:
+        fields -= {name.strip() for name in omitted.split(',')}
+    return fields
@@ -1,27 +1,58 @@
-from django.db.models import Avg
+from django.db.models import Count, F
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
-from django_filters import CharFilter, FilterSet, NumberFilter
-from rest_framework import filters, status, viewsets
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, generics, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.mixins import (
     CreateModelMixin,
     DestroyModelMixin,
     ListModelMixin,)
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
+from api.autocomplete import AUTOCOMPLETE
+from api.cache import (
+    count_event,
+    field_scope,
+    get_last_modified,
+    get_hit_stats,
+    get_or_compute,
+    get_versions,
+    is_missing,
+    make_etag,
+    make_key,
+    mark_missing,
+    model_scope,
+    nested_scope,
+    object_scope,)
+from api.filters import (
+    CommentSearchFilter,
+    FullTextSearchFilter,
+    FuzzyTitleFilter,
+    ReviewSearchFilter,
+    StableOrderingFilter,
+    TitleFilter,)
+from api.pagination import PageNumberOrCursorPagination
 from api.permissions import (
     IsAdminOrReadOnly,
     IsAuthorModeratorAdminOrReadOnly,
     SuperUserOrAdmin,)
 from api.serializers import (
     CategorySerializer,
+    CommentSearchSerializer,
     CommentSerializer,
     GenreSerializer,
+    ReviewSearchSerializer,
     ReviewSerializer,
+    ScoreHistogramSerializer,
     SignUpSerializer,
+    TitleDetailSerializer,
     TitleSerializer,
     TitleCreateSerializer,
     TokenSerializer,
@@ -29,11 +60,168 @@ from api.serializers import (
     UserProfileSerializer)
 from reviews.models import (
     Category,
+    Comment,
     Genre,
     Review,
+    ScoreHistogram,
     Title,)
+from reviews.search import COMMENT_INDEX, REVIEW_INDEX, TITLE_INDEX
 from users.models import User
-from .utils import send_confirmation_code, get_token_for_user
+from .utils import (
+    get_requested_fields,
+    get_token_for_user,
+    send_confirmation_code,)
+
+
+class SparseFieldsViewMixin:
+    """Отложенная загрузка колонок, не запрошенных в `?fields=`/`?omit=`.
+
+    `deferred_columns` сопоставляет полю ответа колонки модели,
+    которые нужны только для него.
+    """
+
+    deferred_columns = {}
+
+    def get_requested_fields(self):
+        return get_requested_fields(
+            self.request, self.get_serializer_class().Meta.fields)
+
+    def defer_unrequested(self, queryset):
+        requested = self.get_requested_fields()
+        columns = [
+            column
+            for field, columns in self.deferred_columns.items()
+            if field not in requested
+            for column in columns
+        ]
+        return queryset.defer(*columns) if columns else queryset
+
+
+class ConditionalListMixin:
+    """ETag и Last-Modified для списка из версий данных.
+
+    Версии читаются из кэша до обращения к БД, поэтому на запрос
+    с актуальным If-None-Match ответ 304 отдаётся без выборки
+    и сериализации.
+    """
+
+    cache_models = ()
+
+    def get_version_scopes(self):
+        return tuple(model_scope(model) for model in self.cache_models)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        # Страница Browsable API зависит от пользователя и CSRF-токена.
+        if request.accepted_renderer.format == 'api':
+            return handler(request, *args, **kwargs)
+        scopes = self.get_version_scopes()
+        versions = get_versions(*scopes)
+        etag = make_etag(request.get_full_path(),
+                         request.accepted_media_type, scopes, versions)
+        last_modified = int(get_last_modified(*scopes))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.get_fresh_response(
+                handler, request, scopes, versions, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_fresh_response(self, handler, request, scopes, versions,
+                           *args, **kwargs):
+        return handler(request, *args, **kwargs)
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """ETag и Last-Modified для списка и отдельного объекта."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class ResponseCacheMixin:
+    """Кэш данных ответа поверх ConditionalListMixin.
+
+    Ключ включает адрес с параметрами запроса и версии областей
+    вьюсета, поэтому запись в любую из них делает ключ неактуальным
+    без явного удаления. Пересчёт идёт через get_or_compute: при
+    истечении срока ответ строит один запрос. Попадания считаются
+    по `basename`.
+    """
+
+    response_cache_timeout = 60 * 60
+    response_cache_anonymous_only = False
+
+    def get_fresh_response(self, handler, request, scopes, versions,
+                           *args, **kwargs):
+        if (self.response_cache_anonymous_only
+                and request.user.is_authenticated):
+            return super().get_fresh_response(
+                handler, request, scopes, versions, *args, **kwargs)
+        # Ссылки пагинации абсолютные, поэтому в ключе полный адрес.
+        key = make_key(
+            'response', request.build_absolute_uri(), scopes, versions)
+        parent = super().get_fresh_response
+        fresh = {}
+
+        def compute():
+            response = fresh['response'] = parent(
+                handler, request, scopes, versions, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                return response.data
+            return None
+
+        data, state = get_or_compute(
+            key, compute, self.response_cache_timeout)
+        count_event(self.basename, 'misses' if fresh else 'hits')
+        response = fresh.get('response') or Response(data)
+        response['X-Cache'] = state.upper()
+        return response
+
+
+class AutocompleteView(APIView):
+    """Подсказки по префиксу названий произведений, категорий и жанров.
+
+    Ответ строится из индекса в памяти процесса без запросов к БД,
+    поэтому аутентификация, которая читает пользователя из БД,
+    здесь отключена: данные публичные.
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    default_limit = 10
+    max_limit = 50
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params['limit'])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    def get(self, request):
+        kinds = request.query_params.get('type')
+        return Response(AUTOCOMPLETE.search(
+            request.query_params.get('q', ''),
+            limit=self.get_limit(),
+            kinds=set(kinds.split(',')) if kinds else None))
+
+
+class CacheStatsView(APIView):
+    """Статистика попаданий в кэш ответов по вьюсетам."""
+
+    permission_classes = (SuperUserOrAdmin,)
+    basenames = ()
+
+    def get(self, request):
+        return Response(get_hit_stats(self.basenames))
 
 
 class SignUpViewSet(viewsets.ViewSet):
@@ -55,7 +243,7 @@ class SignUpViewSet(viewsets.ViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (SuperUserOrAdmin,)
@@ -63,6 +251,10 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ('username',)
     lookup_field = 'username'
     http_method_names = ('get', 'post', 'delete', 'patch')
+    deferred_columns = {'bio': ('bio',)}
+
+    def get_queryset(self):
+        return self.defer_unrequested(super().get_queryset())
 
     @action(
         detail=False,
@@ -70,7 +262,8 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),)
     def me(self, request):
         user = get_object_or_404(User, username=self.request.user)
-        serializer = UserProfileSerializer(user)
+        serializer = UserProfileSerializer(
+            user, context=self.get_serializer_context())
         if request.method == 'PATCH':
             serializer = UserProfileSerializer(
                 user, data=request.data, partial=True)
@@ -103,7 +296,8 @@ class CreateDestroyListMixin(
     pass
 
 
-class CategoryViewSet(CreateDestroyListMixin):
+class CategoryViewSet(ResponseCacheMixin, ConditionalListMixin,
+                      CreateDestroyListMixin):
     """Вьюсет для категорий."""
 
     queryset = Category.objects.all()
@@ -112,9 +306,11 @@ class CategoryViewSet(CreateDestroyListMixin):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_models = (Category,)
 
 
-class GenreViewSet(CreateDestroyListMixin):
+class GenreViewSet(ResponseCacheMixin, ConditionalListMixin,
+                   CreateDestroyListMixin):
     """Вьюсет для жанров."""
 
     queryset = Genre.objects.all()
@@ -123,75 +319,236 @@ class GenreViewSet(CreateDestroyListMixin):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_models = (Genre,)
 
 
-class TitleFilter(FilterSet):
-    name = CharFilter(field_name='name', lookup_expr='icontains')
-    category = CharFilter(field_name='category__slug')
-    genre = CharFilter(field_name='genre__slug')
-    year = NumberFilter(field_name='year')
-
-    class Meta:
-        model = Title
-        fields = ('name', 'category', 'genre', 'year',)
-
-
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ResponseCacheMixin, ConditionalGetMixin,
+                   SparseFieldsViewMixin, viewsets.ModelViewSet):
     """Вьюсет для произведений."""
 
     queryset = Title.objects.all()
     permission_classes = [IsAdminOrReadOnly, ]
+    filter_backends = (
+        DjangoFilterBackend, StableOrderingFilter, FullTextSearchFilter,
+        FuzzyTitleFilter)
     filterset_class = TitleFilter
-    filterset_fields = ('name',)
+    search_index = TITLE_INDEX
+    ordering_fields = ('name', 'year', 'rating', 'review_count')
+    ordering_aliases = {'review_count': 'rating_count'}
     ordering = ('name',)
+    pagination_class = PageNumberOrCursorPagination
+    cache_models = (Title, Title.genre.through, Genre, Category)
+    response_cache_anonymous_only = True
+    deferred_columns = {'description': ('description',)}
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        queryset = queryset.annotate(rating=Avg('review__score'))
+        fields = self.get_requested_fields()
+        queryset = self.defer_unrequested(super().get_queryset())
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+        if 'genre' in fields:
+            queryset = queryset.prefetch_related('genre')
+        if 'histogram' in fields:
+            queryset = queryset.select_related('histogram')
         return queryset
 
+    def get_version_scopes(self):
+        pk = str(self.kwargs.get('pk', ''))
+        if self.action == 'retrieve' and pk.isdigit():
+            return (object_scope(Title, pk),
+                    model_scope(Genre), model_scope(Category))
+        return super().get_version_scopes()
+
     def get_serializer_class(self):
         if self.request.method in ['POST', 'PUT', 'PATCH']:
             return TitleCreateSerializer
+        if self.action == 'retrieve':
+            return TitleDetailSerializer
         return TitleSerializer
 
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Число произведений по жанрам, категориям, годам и десятилетиям.
+
+        Принимает те же параметры фильтрации, что и список; ответ
+        кэшируется по версиям тех же областей.
+        """
+
+        return self.conditional(self.get_facets, request)
+
+    def get_facets(self, request):
+        titles = self.filter_queryset(Title.objects.all()).order_by()
+        filtered = Title.objects.filter(pk__in=titles.values('pk'))
+        genres = (
+            Title.genre.through.objects
+            .filter(title_id__in=titles.values('pk'))
+            .values_list('genre__slug', 'genre__name')
+            .annotate(count=Count('*')).order_by('-count', 'genre__slug'))
+        categories = (
+            filtered.filter(category__isnull=False)
+            .values_list('category__slug', 'category__name')
+            .annotate(count=Count('*')).order_by('-count', 'category__slug'))
+        years = list(filtered.values_list('year').annotate(
+            count=Count('*')).order_by('year'))
+        decades = {}
+        for year, count in years:
+            decade = year // 10 * 10
+            decades[decade] = decades.get(decade, 0) + count
+        return Response({
+            'count': sum(decades.values()),
+            'genre': [
+                {'slug': slug, 'name': name, 'count': count}
+                for slug, name, count in genres],
+            'category': [
+                {'slug': slug, 'name': name, 'count': count}
+                for slug, name, count in categories],
+            'year': [
+                {'year': year, 'count': count} for year, count in years],
+            'decade': [
+                {'decade': decade, 'count': count}
+                for decade, count in decades.items()],
+        })
+
+    @action(detail=True, methods=['get'])
+    def histogram(self, request, pk=None):
+        # get_object_or_404 из DRF отвечает 404 и на нечисловой pk.
+        histogram = generics.get_object_or_404(
+            ScoreHistogram.objects.all(), title_id=pk)
+        serializer = ScoreHistogramSerializer(histogram)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class NestedResourceMixin:
+    """Разрешение родительских объектов из URL.
+
+    Цепочка `title_id`/`review_id` проверяется одним запросом,
+    результат хранится во вьюсете до конца запроса и доступен
+    сериализатору и классам разрешений через `view`. Отсутствие
+    объекта ненадолго кэшируется, и повторные запросы с тем же
+    несуществующим id получают 404 без обращения к БД.
+    """
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_title(self):
+        if not hasattr(self, '_title'):
+            if 'review_id' in self.kwargs:
+                self._title = self.get_review().title
+            else:
+                title_id = self.kwargs.get('title_id')
+                self._title = self.get_existing(
+                    Title.objects.all(),
+                    object_scope(Title, title_id),
+                    pk=title_id)
+        return self._title
+
+    def get_review(self):
+        if not hasattr(self, '_review'):
+            title_id = self.kwargs.get('title_id')
+            review_id = self.kwargs.get('review_id')
+            self._review = self.get_existing(
+                Review.objects.select_related('title'),
+                nested_scope(Review, review_id, title_id),
+                pk=review_id,
+                title_id=title_id)
+        return self._review
+
+    def get_existing(self, queryset, scope, **lookups):
+        if is_missing(scope):
+            raise Http404
+        try:
+            return queryset.get(**lookups)
+        except queryset.model.DoesNotExist:
+            mark_missing(scope)
+            raise Http404
+
+
+class ReviewViewSet(ConditionalGetMixin, NestedResourceMixin,
+                    SparseFieldsViewMixin, viewsets.ModelViewSet):
     """Вьюсет для отзывов."""
 
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthorModeratorAdminOrReadOnly, ]
+    pagination_class = PageNumberOrCursorPagination
+    keyset_ordering = ('pub_date', 'id')
 
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    deferred_columns = {'text': ('text',)}
 
     def get_queryset(self):
-        return Title.objects.get(
-            id=self.kwargs.get('title_id')).review_set.all()
+        if self.action == 'list':
+            self.get_title()
+        queryset = self.defer_unrequested(
+            Review.objects.filter(title_id=self.kwargs.get('title_id')))
+        if 'author' in self.get_requested_fields():
+            queryset = queryset.select_related('author')
+        return queryset
+
+    def get_version_scopes(self):
+        return (object_scope(Title, self.kwargs.get('title_id')),
+                field_scope(User, 'username'))
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, NestedResourceMixin,
+                     SparseFieldsViewMixin, viewsets.ModelViewSet):
     """Вьюсет для комментариев."""
 
     serializer_class = CommentSerializer
     permission_classes = [IsAuthorModeratorAdminOrReadOnly, ]
+    pagination_class = PageNumberOrCursorPagination
+    keyset_ordering = ('pub_date', 'id')
+
+    deferred_columns = {'text': ('text',)}
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        review = get_object_or_404(
-            Review,
-            pk=self.kwargs.get('review_id'),
-            title=title)
-        return review.comments.all()
+        if self.action == 'list':
+            self.get_review()
+        queryset = self.defer_unrequested(Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')))
+        if 'author' in self.get_requested_fields():
+            queryset = queryset.select_related('author')
+        return queryset
+
+    def get_version_scopes(self):
+        return (object_scope(Review, self.kwargs.get('review_id')),
+                field_scope(User, 'username'))
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        review = get_object_or_404(
-            Review,
-            pk=self.kwargs.get('review_id'),
-            title=title)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
+
+
+class TextSearchViewSet(SparseFieldsViewMixin, ListModelMixin,
+                        GenericViewSet):
+    """Поиск по тексту отзывов и комментариев.
+
+    `?search=` обязателен, результаты идут по убыванию релевантности.
+    """
+
+    permission_classes = [AllowAny, ]
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter)
+    search_required = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if 'author' in self.get_requested_fields():
+            queryset = queryset.select_related('author')
+        return queryset
+
+
+class ReviewSearchViewSet(TextSearchViewSet):
+    """Поиск по отзывам."""
+
+    queryset = Review.objects.all()
+    serializer_class = ReviewSearchSerializer
+    filterset_class = ReviewSearchFilter
+    search_index = REVIEW_INDEX
+
+
+class CommentSearchViewSet(TextSearchViewSet):
+    """Поиск по комментариям."""
+
+    queryset = Comment.objects.annotate(title_id=F('review__title_id'))
+    serializer_class = CommentSearchSerializer
+    filterset_class = CommentSearchFilter
+    search_index = COMMENT_INDEX
@@ -0,0 +1,85 @@
+from django.db import migrations
+
+# SQL индекса зафиксирован на момент миграции и не зависит от
+# reviews.search: последующие правки индекса — новые миграции.
+SQLITE_INSTALL = [
+    'DROP TABLE IF EXISTS reviews_title_fts',
+    "CREATE VIRTUAL TABLE reviews_title_fts USING fts5("
+    "name, description, content='', tokenize='unicode61')",
+    'INSERT INTO reviews_title_fts(rowid, name, description) '
+    "SELECT id, replace(replace(name, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(description, 'ё', 'е'), 'Ё', 'Е') FROM reviews_title",
+    'CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title '
+    'BEGIN INSERT INTO reviews_title_fts(rowid, name, description) '
+    "VALUES (new.id, replace(replace(new.name, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(new.description, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title '
+    'BEGIN INSERT INTO reviews_title_fts('
+    'reviews_title_fts, rowid, name, description) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.name, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(old.description, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER reviews_title_fts_update '
+    'AFTER UPDATE OF name, description ON reviews_title '
+    'BEGIN INSERT INTO reviews_title_fts('
+    'reviews_title_fts, rowid, name, description) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.name, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(old.description, 'ё', 'е'), 'Ё', 'Е')); "
+    'INSERT INTO reviews_title_fts(rowid, name, description) '
+    "VALUES (new.id, replace(replace(new.name, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(new.description, 'ё', 'е'), 'Ё', 'Е')); END",
+]
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+    'DROP TABLE IF EXISTS reviews_title_fts',
+]
+POSTGRES_INSTALL = [
+    'CREATE INDEX IF NOT EXISTS reviews_title_search_idx ON reviews_title '
+    "USING GIN (to_tsvector('simple', replace(lower("
+    "coalesce(\"name\", '') || ' ' || coalesce(\"description\", '')), "
+    "'ё', 'е')))",
+]
+POSTGRES_UNINSTALL = ['DROP INDEX IF EXISTS reviews_title_search_idx']
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any('FTS5' in option for option, in cursor.fetchall())
+
+
+def run(schema_editor, sqlite, postgres):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        statements = sqlite
+    elif connection.vendor == 'postgresql':
+        statements = postgres
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def install_search(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and not sqlite_has_fts5(connection):
+        return
+    run(schema_editor, SQLITE_INSTALL, POSTGRES_INSTALL)
+
+
+def uninstall_search(apps, schema_editor):
+    run(schema_editor, SQLITE_UNINSTALL, POSTGRES_UNINSTALL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2 on 2026-10-18 18:19
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+WORD = re.compile(r'\w+')
+
+
+def trigrams(text):
+    """Триграммы названия на момент миграции, как в pg_trgm."""
+
+    result = set()
+    for word in WORD.findall(text.casefold().replace('ё', 'е')):
+        padded = f'  {word} '
+        result.update(
+            padded[start:start + 3] for start in range(len(padded) - 2))
+    return result
+
+
+def fill_trigrams(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleTrigram = apps.get_model('reviews', 'TitleTrigram')
+    TitleTrigram.objects.bulk_create(
+        TitleTrigram(title_id=title_id, trigram=trigram)
+        for title_id, name in Title.objects.values_list('id', 'name')
+        for trigram in trigrams(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='reviews.title')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='titletrigram',
+            index=models.Index(fields=['trigram', 'title'], name='trigram_title_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titletrigram',
+            constraint=models.UniqueConstraint(fields=('title', 'trigram'), name='unique_title_trigram'),
+        ),
+        migrations.RunPython(fill_trigrams, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,110 @@
+from django.db import migrations
+
+# SQL индексов зафиксирован на момент миграции и не зависит от
+# reviews.search: последующие правки индексов — новые миграции.
+SQLITE_INSTALL = [
+    'DROP TABLE IF EXISTS reviews_review_fts',
+    "CREATE VIRTUAL TABLE reviews_review_fts USING fts5("
+    "text, content='', tokenize='unicode61')",
+    'INSERT INTO reviews_review_fts(rowid, text) '
+    "SELECT id, replace(replace(text, 'ё', 'е'), 'Ё', 'Е') "
+    'FROM reviews_review',
+    'CREATE TRIGGER reviews_review_fts_insert AFTER INSERT ON reviews_review '
+    'BEGIN INSERT INTO reviews_review_fts(rowid, text) '
+    "VALUES (new.id, replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER reviews_review_fts_delete AFTER DELETE ON reviews_review '
+    'BEGIN INSERT INTO reviews_review_fts(reviews_review_fts, rowid, text) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER reviews_review_fts_update '
+    'AFTER UPDATE OF text ON reviews_review '
+    'BEGIN INSERT INTO reviews_review_fts(reviews_review_fts, rowid, text) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е')); "
+    'INSERT INTO reviews_review_fts(rowid, text) '
+    "VALUES (new.id, replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    'DROP TABLE IF EXISTS reviews_comment_fts',
+    "CREATE VIRTUAL TABLE reviews_comment_fts USING fts5("
+    "text, content='', tokenize='unicode61')",
+    'INSERT INTO reviews_comment_fts(rowid, text) '
+    "SELECT id, replace(replace(text, 'ё', 'е'), 'Ё', 'Е') "
+    'FROM reviews_comment',
+    'CREATE TRIGGER reviews_comment_fts_insert '
+    'AFTER INSERT ON reviews_comment '
+    'BEGIN INSERT INTO reviews_comment_fts(rowid, text) '
+    "VALUES (new.id, replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER reviews_comment_fts_delete '
+    'AFTER DELETE ON reviews_comment '
+    'BEGIN INSERT INTO reviews_comment_fts(reviews_comment_fts, rowid, text) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER reviews_comment_fts_update '
+    'AFTER UPDATE OF text ON reviews_comment '
+    'BEGIN INSERT INTO reviews_comment_fts(reviews_comment_fts, rowid, text) '
+    "VALUES ('delete', old.id, "
+    "replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е')); "
+    'INSERT INTO reviews_comment_fts(rowid, text) '
+    "VALUES (new.id, replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')); END",
+]
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS reviews_review_fts_insert',
+    'DROP TRIGGER IF EXISTS reviews_review_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_review_fts_update',
+    'DROP TABLE IF EXISTS reviews_review_fts',
+    'DROP TRIGGER IF EXISTS reviews_comment_fts_insert',
+    'DROP TRIGGER IF EXISTS reviews_comment_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_comment_fts_update',
+    'DROP TABLE IF EXISTS reviews_comment_fts',
+]
+POSTGRES_INSTALL = [
+    'CREATE INDEX IF NOT EXISTS reviews_review_search_idx ON reviews_review '
+    "USING GIN (to_tsvector('simple', replace(lower("
+    "coalesce(\"text\", '')), 'ё', 'е')))",
+    'CREATE INDEX IF NOT EXISTS reviews_comment_search_idx ON reviews_comment '
+    "USING GIN (to_tsvector('simple', replace(lower("
+    "coalesce(\"text\", '')), 'ё', 'е')))",
+]
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS reviews_review_search_idx',
+    'DROP INDEX IF EXISTS reviews_comment_search_idx',
+]
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any('FTS5' in option for option, in cursor.fetchall())
+
+
+def run(schema_editor, sqlite, postgres):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        statements = sqlite
+    elif connection.vendor == 'postgresql':
+        statements = postgres
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def install_search(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and not sqlite_has_fts5(connection):
+        return
+    run(schema_editor, SQLITE_INSTALL, POSTGRES_INSTALL)
+
+
+def uninstall_search(apps, schema_editor):
+    run(schema_editor, SQLITE_UNINSTALL, POSTGRES_UNINSTALL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_titletrigram'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-18 19:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentSearchEntry',
+            fields=[
+                ('comment', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='reviews.comment')),
+                ('document', models.TextField(db_column='reviews_comment_fts')),
+            ],
+            options={
+                'db_table': 'reviews_comment_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewSearchEntry',
+            fields=[
+                ('review', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='reviews.review')),
+                ('document', models.TextField(db_column='reviews_review_fts')),
+            ],
+            options={
+                'db_table': 'reviews_review_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TitleSearchEntry',
+            fields=[
+                ('title', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='reviews.title')),
+                ('document', models.TextField(db_column='reviews_title_fts')),
+            ],
+            options={
+                'db_table': 'reviews_title_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,5 +1,8 @@
+import math
+
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DEFERRED
 
 from users.constants import (
     MAX_LEN_NAME,
@@ -49,13 +52,171 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         blank=True,
         null=True, )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False)
+    rating_count = models.PositiveIntegerField(
+        'Количество отзывов', default=0, editable=False)
+    rating = models.FloatField('Рейтинг', default=0, editable=False)
 
     class Meta:
         ordering = ('id',)
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_idx'),
+            models.Index(fields=('year', 'id'), name='title_year_idx'),
+            models.Index(
+                fields=('year', 'name', 'id'), name='title_year_name_idx'),
+            models.Index(fields=('rating', 'id'), name='title_rating_idx'),
+            models.Index(
+                fields=('rating_count', 'id'),
+                name='title_review_count_idx'),
+            models.Index(
+                fields=('category', 'rating', 'id'),
+                name='title_category_rating_idx'),
+            models.Index(
+                fields=('category', 'name', 'id'),
+                name='title_category_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def average_score(self):
+        """Средняя оценка или None, если отзывов ещё нет."""
+
+        return self.rating if self.rating_count else None
+
+
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+
+
+class ScoreHistogram(models.Model):
+    """Распределение оценок произведения."""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='histogram', )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.title_id)
+
+    @staticmethod
+    def field_name(score):
+        return f'score_{score}'
+
+    @property
+    def counts(self):
+        return {score: getattr(self, self.field_name(score))
+                for score in SCORES}
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def mean(self):
+        total = self.total
+        if not total:
+            return None
+        return sum(
+            score * count for score, count in self.counts.items()) / total
+
+    def percentile(self, percent):
+        """Оценка на заданном процентиле (метод ближайшего ранга)."""
+
+        total = self.total
+        if not total:
+            return None
+        rank = max(1, math.ceil(percent / 100 * total))
+        seen = 0
+        for score, count in self.counts.items():
+            seen += count
+            if seen >= rank:
+                return score
+
+    @property
+    def median(self):
+        return self.percentile(50)
+
+
+class TitleTrigram(models.Model):
+    """Триграмма названия произведения для нечёткого поиска."""
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='trigrams', )
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'trigram'),
+                name='unique_title_trigram'),
+        ]
+        indexes = [
+            models.Index(
+                fields=('trigram', 'title'), name='trigram_title_idx'),
+        ]
+
+    def __str__(self):
+        return self.trigram
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец таблицы FTS5, названный как сама таблица.
+
+    Сравнение `__match` с ним — полнотекстовый запрос MATCH.
+    """
+
+    def deconstruct(self):
+        # Миграциям достаточно TextField: lookup нужен только запросам.
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.TextField', args, kwargs
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class TitleSearchEntry(models.Model):
+    """Строка FTS5-индекса произведений (только SQLite).
+
+    Таблицу создаёт миграция 0009; модель нужна, чтобы соединять
+    произведения с индексом по rowid и считать bm25 за один проход.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_entry', )
+    document = SearchDocumentField(db_column='reviews_title_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'reviews_title_fts'
+
 
 class Review(models.Model):
     """Модель отзывов."""
@@ -76,10 +237,71 @@ class Review(models.Model):
             models.UniqueConstraint(
                 fields=['author', 'title'],
                 name='unique_author_title')]
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'),
+            models.Index(fields=('title', 'id'), name='review_title_id_idx'),
+        ]
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if value is not DEFERRED}
+        return instance
+
+    def lock_stored_values(self):
+        """Блокировка строки и чтение сохранённых title_id и score.
+
+        Разница для рейтинга считается от них, а не от значений,
+        прочитанных до транзакции: иначе параллельная запись того же
+        отзыва навсегда расходится с суммой оценок.
+        """
+
+        stored = type(self).objects.select_for_update().filter(
+            pk=self.pk).values('title_id', 'score').first()
+        self._loaded_values = stored
+        return stored
+
+    def save(self, *args, **kwargs):
+        """Сохранение отзыва и пересчёт рейтинга в одной транзакции."""
+
+        with transaction.atomic():
+            if not self._state.adding and self.pk is not None:
+                self.lock_stored_values()
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """Удаление отзыва, если он ещё есть, и пересчёт рейтинга."""
+
+        with transaction.atomic():
+            if self.lock_stored_values() is None:
+                # Строку уже удалил другой запрос, и рейтинг уменьшен.
+                return 0, {}
+            return super().delete(*args, **kwargs)
+
+
+class ReviewSearchEntry(models.Model):
+    """Строка FTS5-индекса отзывов (только SQLite), см. TitleSearchEntry."""
+
+    review = models.OneToOneField(
+        Review,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_entry', )
+    document = SearchDocumentField(db_column='reviews_review_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'reviews_review_fts'
+
 
 class Comment(models.Model):
     author = models.ForeignKey(
@@ -98,6 +320,30 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'),
+            models.Index(
+                fields=('review', 'id'), name='comment_review_id_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class CommentSearchEntry(models.Model):
+    """Строка FTS5-индекса комментариев (только SQLite)."""
+
+    comment = models.OneToOneField(
+        Comment,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_entry', )
+    document = SearchDocumentField(db_column='reviews_comment_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'reviews_comment_fts'
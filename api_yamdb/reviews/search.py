@@ -0,0 +1,219 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import (
+    BooleanField,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Func,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,)
+from django.db.models.functions import Cast, Coalesce, Lower, Replace
+
+from reviews.models import TitleTrigram
+
+WORD = re.compile(r'\w+')
+# related_name строк FTS-индекса у индексируемых моделей.
+SEARCH_RELATION = 'search_entry'
+POSTGRES_WEIGHTS = 'ABCD'
+SIMILARITY_THRESHOLD = 0.3
+
+
+def normalize(text):
+    """Приведение текста к виду, в котором он лежит в индексе."""
+
+    return text.casefold().replace('ё', 'е')
+
+
+def words(text):
+    return WORD.findall(normalize(text))
+
+
+def trigrams(text):
+    """Триграммы слов с отступами по краям, как в pg_trgm."""
+
+    result = set()
+    for word in words(text):
+        padded = f'  {word} '
+        result.update(
+            padded[start:start + 3] for start in range(len(padded) - 2))
+    return result
+
+
+class BM25(Func):
+    """Релевантность FTS5: чем больше, тем релевантнее (-bm25)."""
+
+    function = 'bm25'
+    template = '-%(function)s(%(expressions)s)'
+    output_field = FloatField()
+
+
+class Infix(Func):
+    """Операнды, соединённые одним оператором: `a || b`, `a @@ b`."""
+
+    template = '(%(expressions)s)'
+
+    def __init__(self, *expressions, operator, **extra):
+        super().__init__(*expressions, arg_joiner=f' {operator} ', **extra)
+
+
+class FullTextIndex:
+    """Полнотекстовый индекс по текстовым колонкам таблицы.
+
+    На SQLite это contentless-таблица FTS5, которую заполняют триггеры,
+    на PostgreSQL — GIN-индекс по tsvector. Регистр приводит сам
+    токенизатор, `ё` заменяется на `е` и в индексе, и в запросе.
+    Если индекса нет (другая СУБД или SQLite без FTS5), поиск
+    сводится к icontains по тем же колонкам.
+
+    Таблицы, триггеры и индексы создают миграции 0009 и 0011 своим
+    зафиксированным SQL. Пересоздание таблицы при миграции на SQLite
+    удаляет её триггеры, поэтому такая миграция должна создать их
+    заново тем же SQL.
+    """
+
+    def __init__(self, table, columns, weights):
+        self.table = table
+        self.columns = columns
+        self.weights = weights
+        self.fts_table = f'{table}_fts'
+        self._ready = set()
+
+    def postgres_vector(self, columns):
+        # То же выражение, что в GIN-индексе миграции 0009, иначе
+        # PostgreSQL индекс не применит. Столбцы — F(), а не имена
+        # с таблицей: во вложенном запросе у таблицы другой псевдоним.
+        parts = []
+        for column in columns:
+            if parts:
+                parts.append(Value(' '))
+            parts.append(Coalesce(column, Value(''), output_field=TextField()))
+        text = Infix(*parts, operator='||', output_field=TextField())
+        return Func(
+            Value('simple'),
+            Replace(Lower(text), Value('ё'), Value('е'),
+                    output_field=TextField()),
+            function='to_tsvector', output_field=TextField())
+
+    def is_ready(self, connection):
+        if connection.alias in self._ready:
+            return True
+        if connection.vendor == 'postgresql':
+            ready = True
+        elif connection.vendor == 'sqlite':
+            ready = self.fts_table in connection.introspection.table_names()
+        else:
+            ready = False
+        if ready:
+            self._ready.add(connection.alias)
+        return ready
+
+    def search(self, queryset, text):
+        """Отбор по словам запроса и аннотация `search_rank`.
+
+        Каждое слово ищется как префикс, все слова должны найтись.
+        Чем выше `search_rank`, тем релевантнее запись.
+        """
+
+        terms = words(text)
+        if not terms:
+            return self.without_rank(queryset.none())
+        connection = connections[queryset.db]
+        if not self.is_ready(connection):
+            return self.search_fallback(queryset, terms)
+        if connection.vendor == 'sqlite':
+            return self.search_sqlite(queryset, terms)
+        return self.search_postgres(queryset, terms)
+
+    def search_sqlite(self, queryset, terms):
+        # Соединение с FTS-таблицей по rowid: план начинается с MATCH,
+        # и bm25 считается в том же проходе, без подзапроса на строку.
+        match = ' '.join(f'"{term}"*' for term in terms)
+        document = f'{SEARCH_RELATION}__document'
+        rank = BM25(document, *(Value(weight) for weight in self.weights))
+        return queryset.filter(
+            **{f'{document}__match': match}).annotate(search_rank=rank)
+
+    def search_postgres(self, queryset, terms):
+        query = Func(
+            Value('simple'), Value(' & '.join(f'{term}:*' for term in terms)),
+            function='to_tsquery', output_field=TextField())
+        matched = Infix(
+            self.postgres_vector(self.columns), query,
+            operator='@@', output_field=BooleanField())
+        weighted = Infix(*(
+            Func(self.postgres_vector([column]), Value(weight),
+                 function='setweight', output_field=TextField())
+            for column, weight in zip(self.columns, POSTGRES_WEIGHTS)),
+            operator='||', output_field=TextField())
+        rank = Func(
+            weighted, query, function='ts_rank', output_field=FloatField())
+        return (queryset.alias(search_match=matched)
+                .filter(search_match=True)
+                .annotate(search_rank=rank))
+
+    def search_fallback(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(reduce(or_, (
+                Q(**{f'{column}__icontains': term})
+                for column in self.columns)))
+        return self.without_rank(queryset)
+
+    def without_rank(self, queryset):
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField()))
+
+
+TITLE_INDEX = FullTextIndex(
+    'reviews_title', ('name', 'description'), weights=(10.0, 1.0))
+REVIEW_INDEX = FullTextIndex('reviews_review', ('text',), weights=(1.0,))
+COMMENT_INDEX = FullTextIndex('reviews_comment', ('text',), weights=(1.0,))
+
+
+def update_trigrams(title):
+    """Приведение триграмм названия к текущему названию."""
+
+    expected = trigrams(title.name)
+    existing = set(title.trigrams.values_list('trigram', flat=True))
+    if existing - expected:
+        title.trigrams.filter(trigram__in=existing - expected).delete()
+    TitleTrigram.objects.bulk_create(
+        TitleTrigram(title=title, trigram=trigram)
+        for trigram in expected - existing)
+
+
+def count_trigrams(**filters):
+    return Subquery(
+        TitleTrigram.objects.filter(title=OuterRef('pk'), **filters)
+        .order_by().values('title').annotate(count=Count('*'))
+        .values('count'))
+
+
+def similar_titles(queryset, text, threshold=SIMILARITY_THRESHOLD):
+    """Отбор произведений по сходству триграмм названия с запросом.
+
+    Кандидаты находятся по индексу триграмм, сходство — коэффициент
+    Жаккара между множествами триграмм; аннотируется `similarity`.
+    """
+
+    query = trigrams(text)
+    if not query:
+        return queryset.none().annotate(
+            similarity=Value(0.0, output_field=FloatField()))
+    candidates = TitleTrigram.objects.filter(
+        trigram__in=query).values('title')
+    return queryset.filter(pk__in=candidates).annotate(
+        shared_trigrams=count_trigrams(trigram__in=query),
+        total_trigrams=count_trigrams(),
+    ).annotate(similarity=ExpressionWrapper(
+        Cast('shared_trigrams', FloatField())
+        / (len(query) + F('total_trigrams') - F('shared_trigrams')),
+        output_field=FloatField()),
+    ).filter(similarity__gte=threshold)
@@ -0,0 +1,95 @@
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import SCORES, Review, ScoreHistogram, Title
+from .search import update_trigrams
+
+
+def update_rating(title_id, score_delta, count_delta):
+    """Инкрементальное обновление рейтинга произведения.
+
+    Все выражения в UPDATE вычисляются по значениям строки
+    до обновления, поэтому рейтинг считается от новых суммы и количества.
+    """
+
+    rating_sum = F('rating_sum') + score_delta
+    rating_count = F('rating_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=Coalesce(
+            Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+            0.0,
+            output_field=FloatField()))
+
+
+def update_histogram(title_id, score, delta):
+    field = ScoreHistogram.field_name(score)
+    ScoreHistogram.objects.filter(title_id=title_id).update(
+        **{field: F(field) + delta})
+
+
+def rebuild_histogram(title_id):
+    counts = dict(
+        Review.objects.filter(title_id=title_id)
+        .values_list('score').annotate(Count('id')).order_by())
+    ScoreHistogram.objects.update_or_create(
+        title_id=title_id,
+        defaults={ScoreHistogram.field_name(score): counts.get(score, 0)
+                  for score in SCORES})
+
+
+def recalculate_rating(title_id):
+    """Полный пересчёт рейтинга, когда прежняя оценка неизвестна."""
+
+    totals = Review.objects.filter(title_id=title_id).aggregate(
+        rating_sum=Coalesce(Sum('score'), 0),
+        rating_count=Count('id'))
+    Title.objects.filter(pk=title_id).update(
+        rating=(totals['rating_sum'] / totals['rating_count']
+                if totals['rating_count'] else 0.0),
+        **totals)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None)
+    if created and not raw:
+        update_rating(instance.title_id, instance.score, 1)
+        update_histogram(instance.title_id, instance.score, 1)
+    elif raw or loaded is None:
+        recalculate_rating(instance.title_id)
+        rebuild_histogram(instance.title_id)
+    else:
+        old_title_id = loaded.get('title_id', instance.title_id)
+        old_score = loaded.get('score', instance.score)
+        if old_title_id != instance.title_id:
+            update_rating(old_title_id, -old_score, -1)
+            update_rating(instance.title_id, instance.score, 1)
+        elif old_score != instance.score:
+            update_rating(instance.title_id, instance.score - old_score, 0)
+        if (old_title_id, old_score) != (instance.title_id, instance.score):
+            update_histogram(old_title_id, old_score, -1)
+            update_histogram(instance.title_id, instance.score, 1)
+    instance._loaded_values = {
+        'title_id': instance.title_id, 'score': instance.score}
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    # Значения строки, прочитанные при удалении: у переданного
+    # объекта они могут быть устаревшими.
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    title_id = loaded.get('title_id', instance.title_id)
+    score = loaded.get('score', instance.score)
+    update_rating(title_id, -score, -1)
+    update_histogram(title_id, score, -1)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, created, **kwargs):
+    if created:
+        ScoreHistogram.objects.get_or_create(title=instance)
+    update_trigrams(instance)
@@ -0,0 +1,15 @@
+import pytest
+from django.core.cache import cache
+
+from api.cache import flush_events
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Версии и ответы в кэше не должны переживать очистку БД."""
+
+    flush_events()
+    cache.clear()
+    yield
+    flush_events()
+    cache.clear()
@@ -0,0 +1,180 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review, Title
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_writes(self, client, admin_client,
+                                             admin, user, user_client,
+                                             moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'создании отзыва.'
+        )
+
+        response = user_client.patch(
+            f'{url}{reviews[1]["id"]}/', data={'score': 8})
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки отзыва.'
+        )
+
+        response = admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+        for review in reviews[1:]:
+            admin_client.delete(f'{url}{review["id"]}/')
+        assert self.get_rating(client, title_id) is None, (
+            'Проверьте, что рейтинг произведения без отзывов равен `None`.'
+        )
+
+    def test_02_score_histogram(self, client, admin_client, admin, user,
+                                user_client, moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/',
+            data={'score': 9})
+
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        histogram = response.json().get('histogram')
+        assert histogram == {
+            str(score): {5: 2, 9: 1}.get(score, 0) for score in range(1, 11)
+        }, (
+            'Проверьте, что ответ на GET-запрос к `/api/v1/titles/{id}/` '
+            'содержит распределение оценок в поле `histogram`.'
+        )
+
+        url = f'/api/v1/titles/{title_id}/histogram/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        data = response.json()
+        assert data['count'] == 3
+        assert data['median'] == 5
+        assert data['mean'] == pytest.approx(19 / 3)
+        assert data['percentiles']['90'] == 9
+
+        response = client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/histogram/')
+        assert response.json()['median'] is None, (
+            'Проверьте, что для произведения без отзывов медиана равна '
+            '`None`.'
+        )
+        for title_id in (999, 'abc'):
+            url = f'/api/v1/titles/{title_id}/histogram/'
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+                'статусом 404.'
+            )
+
+    def test_03_ordering_by_rating(self, client, admin_client, admin, user,
+                                   user_client, moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, titles = create_reviews(admin_client, author_map)
+        create_single_review(user_client, titles[1]['id'], 'Отлично', 9)
+        url = '/api/v1/titles/'
+
+        response = client.get(f'{url}?ordering=-rating')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}?ordering=-rating` '
+            'возвращает ответ со статусом 200.'
+        )
+        ids = [title['id'] for title in response.json()['results']]
+        assert ids == [titles[1]['id'], titles[0]['id']], (
+            'Проверьте, что произведения сортируются по рейтингу.'
+        )
+
+        response = client.get(f'{url}?ordering=-review_count')
+        ids = [title['id'] for title in response.json()['results']]
+        assert ids == [titles[0]['id'], titles[1]['id']], (
+            'Проверьте, что произведения сортируются по количеству отзывов.'
+        )
+
+        response = client.get(f'{url}?ordering=year')
+        years = [title['year'] for title in response.json()['results']]
+        assert years == sorted(years), (
+            'Проверьте, что произведения сортируются по году выпуска.'
+        )
+
+    def test_04_stale_writes_keep_rating(self, user, admin):
+        title = Title.objects.create(name='Солярис', year=1972)
+        Review.objects.create(title=title, author=admin, text='Да', score=7)
+        review = Review.objects.create(
+            title=title, author=user, text='Скучно', score=5)
+        first, stale = (Review.objects.get(pk=review.pk) for _ in range(2))
+        first.score = 2
+        first.save()
+        stale.text = 'Передумал'
+        stale.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (12, 2), (
+            'Проверьте, что рейтинг считается от оценки, сохранённой '
+            'в базе, а не от прочитанной до записи.'
+        )
+        again = Review.objects.get(pk=review.pk)
+        review.delete()
+        again.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (7, 1), (
+            'Проверьте, что повторное удаление отзыва не уменьшает '
+            'рейтинг второй раз.'
+        )
+
+    def test_05_stale_writes_keep_histogram(self, user):
+        title = Title.objects.create(name='Солярис', year=1972)
+        review = Review.objects.create(
+            title=title, author=user, text='Скучно', score=5)
+        first, second = (Review.objects.get(pk=review.pk) for _ in range(2))
+        first.score = 3
+        first.save()
+        second.score = 8
+        second.save()
+        title.histogram.refresh_from_db()
+        assert title.histogram.counts == {
+            score: int(score == 8) for score in range(1, 11)}, (
+            'Проверьте, что распределение оценок считается от оценки, '
+            'сохранённой в базе, а не от прочитанной до записи.'
+        )
+        first.delete()
+        second.delete()
+        title.histogram.refresh_from_db()
+        assert title.histogram.total == 0, (
+            'Проверьте, что повторное удаление отзыва не меняет '
+            'распределение оценок.'
+        )
@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+TITLE_LIST_BUDGET = 3
+TITLE_DETAIL_BUDGET = 2
+
+
+def create_catalog(size):
+    category, _ = Category.objects.get_or_create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.get_or_create(name='Драма', slug='drama')[0],
+        Genre.objects.get_or_create(name='Комедия', slug='comedy')[0],
+    ]
+    titles = []
+    for number in range(size):
+        title = Title.objects.create(
+            name=f'Произведение {number}', year=2000, category=category)
+        title.genre.set(genres)
+        titles.append(title)
+    return titles
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryBudget:
+
+    def test_01_title_list(self, client):
+        url = '/api/v1/titles/'
+        create_catalog(1)
+        small_page = count_queries(client, url)
+        create_catalog(10)
+        full_page = count_queries(client, url)
+        assert small_page == full_page, (
+            f'Проверьте, что количество запросов к БД при GET-запросе к '
+            f'`{url}` не зависит от количества произведений на странице.'
+        )
+        assert full_page <= TITLE_LIST_BUDGET, (
+            f'GET-запрос к `{url}` выполняет {full_page} запросов к БД, '
+            f'допустимо не больше {TITLE_LIST_BUDGET}.'
+        )
+
+    def test_02_title_detail(self, client):
+        title, *_ = create_catalog(1)
+        url = f'/api/v1/titles/{title.id}/'
+        queries = count_queries(client, url)
+        assert queries <= TITLE_DETAIL_BUDGET, (
+            f'GET-запрос к `{url}` выполняет {queries} запросов к БД, '
+            f'допустимо не больше {TITLE_DETAIL_BUDGET}.'
+        )
+
+    def test_03_nested_review_and_comment(self, user, user_client):
+        title, *_ = create_catalog(1)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Ок', 'score': 7})
+        assert response.status_code == HTTPStatus.CREATED
+        title_lookups = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_title"' in query['sql']
+        ]
+        assert len(title_lookups) == 1, (
+            f'Проверьте, что при POST-запросе к `{url}` произведение '
+            'запрашивается из БД один раз.'
+        )
+        review_id = response.json()['id']
+        url = f'/api/v1/titles/{title.id}/reviews/{review_id}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Согласен'})
+        assert response.status_code == HTTPStatus.CREATED
+        parent_lookups = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and ('FROM "reviews_title"' in query['sql']
+                 or 'FROM "reviews_review"' in query['sql'])
+        ]
+        assert len(parent_lookups) == 1, (
+            f'Проверьте, что при POST-запросе к `{url}` отзыв и произведение '
+            'запрашиваются из БД одним запросом.'
+        )
+
+    def test_04_review_and_comment_lists(self, client, django_user_model):
+        title, *_ = create_catalog(1)
+        urls = (
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{{review_id}}/comments/',
+        )
+        review = None
+        counts = []
+        for number in range(5):
+            author = django_user_model.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@yamdb.fake')
+            created = Review.objects.create(
+                title=title, author=author, text='Да', score=5)
+            review = review or created
+            Comment.objects.create(review=review, author=author, text='Да')
+            counts.append([
+                count_queries(client, url.format(review_id=review.id))
+                for url in urls
+            ])
+        assert counts[0] == counts[-1], (
+            'Проверьте, что авторы отзывов и комментариев загружаются '
+            'одним запросом вместе со списком.'
+        )
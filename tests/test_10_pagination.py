@@ -0,0 +1,161 @@
+import base64
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Genre, Review, Title
+
+
+def walk(client, url, link='next'):
+    results = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        results.extend(data['results'])
+        url = data[link]
+    return results, data
+
+
+def tampered_cursor(ordering, values):
+    cursor = json.dumps({'o': ordering, 'v': values, 'r': 0})
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Pagination:
+
+    def create_reviews(self, django_user_model, count):
+        title = Title.objects.create(name='Сталкер', year=1979)
+        for number in range(count):
+            author = django_user_model.objects.create_user(
+                username=f'reader{number}',
+                email=f'reader{number}@yamdb.fake')
+            Review.objects.create(
+                title=title, author=author, text=f'Отзыв {number}', score=7)
+        return title
+
+    def test_01_review_cursor(self, client, django_user_model):
+        title = self.create_reviews(django_user_model, 12)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        results, last_page = walk(client, f'{url}?pagination=cursor')
+        assert 'count' not in last_page, (
+            f'Проверьте, что курсорная пагинация `{url}` не считает '
+            'общее количество объектов.'
+        )
+        expected = list(Review.objects.order_by(
+            'pub_date', 'id').values_list('id', flat=True))
+        assert [review['id'] for review in results] == expected, (
+            f'Проверьте, что курсорная пагинация `{url}` возвращает все '
+            'отзывы по порядку и без повторов.'
+        )
+
+        response = client.get(last_page['previous'])
+        previous = [review['id'] for review in response.json()['results']]
+        assert previous == expected[5:10], (
+            f'Проверьте, что ссылка `previous` курсорной пагинации `{url}` '
+            'ведёт на предыдущую страницу.'
+        )
+
+        response = client.get(f'{url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что для некорректного курсора возвращается ответ '
+            'со статусом 404.'
+        )
+
+    def test_02_page_number_by_default(self, client, django_user_model):
+        title = self.create_reviews(django_user_model, 6)
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.json()['count'] == 6, (
+            'Проверьте, что без параметра `pagination=cursor` сохраняется '
+            'постраничная пагинация.'
+        )
+
+    def test_03_title_cursor_with_ordering(self, client):
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        for number in range(13):
+            title = Title.objects.create(
+                name=f'Фильм {number % 4}', year=1990 + number % 3)
+            if number % 2:
+                title.genre.add(drama)
+        url = '/api/v1/titles/'
+        for query, expected in (
+            ('ordering=-year,name', Title.objects.order_by(
+                '-year', 'name', '-id')),
+            ('ordering=name&genre=drama', Title.objects.filter(
+                genre=drama).order_by('name', 'id')),
+        ):
+            results, _ = walk(client, f'{url}?pagination=cursor&{query}')
+            assert [title['id'] for title in results] == list(
+                expected.values_list('id', flat=True)), (
+                f'Проверьте, что курсорная пагинация `{url}?{query}` '
+                'возвращает все произведения в порядке сортировки.'
+            )
+
+        _, first_page = walk(client, f'{url}?pagination=cursor&ordering=year')
+        response = client.get(
+            first_page['previous'].replace('ordering=year', 'ordering=name'))
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что курсор нельзя использовать с другой сортировкой.'
+        )
+
+    def test_04_optional_count(self, client, admin_client,
+                               django_user_model):
+        title = self.create_reviews(django_user_model, 7)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{url}?count=false')
+        data = response.json()
+        assert not any('COUNT(' in query['sql']
+                       for query in context.captured_queries), (
+            f'Проверьте, что `{url}?count=false` не выполняет COUNT(*).'
+        )
+        assert 'count' not in data and data['next'], (
+            f'Проверьте, что `{url}?count=false` не возвращает `count`, '
+            'но сохраняет ссылку на следующую страницу.'
+        )
+        response = client.get(data['next'])
+        data = response.json()
+        assert len(data['results']) == 2 and data['next'] is None
+
+        assert client.get(f'{url}?count=cached').json()['count'] == 7
+        review = Review.objects.filter(title=title).first()
+        admin_client.delete(f'{url}{review.id}/')
+        assert client.get(f'{url}?count=cached').json()['count'] == 6, (
+            f'Проверьте, что кэшированное количество для `{url}` '
+            'сбрасывается при удалении отзыва.'
+        )
+
+    def test_05_malformed_cursor_values(self, client, django_user_model):
+        title = self.create_reviews(django_user_model, 2)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        for values in (['notadate', 1], [None, 1], [[1], 1],
+                       ['2020-01-01T00:00:00+00:00', {'id': 1}],
+                       ['2020-01-01T00:00:00+00:00', 10 ** 30]):
+            cursor = tampered_cursor(['pub_date', 'id'], values)
+            response = client.get(url, {'cursor': cursor})
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что курсор со значениями неподходящего типа '
+                f'({values}) возвращает ответ со статусом 404.'
+            )
+
+    def test_06_malformed_cursor_with_ordering(self, client):
+        Title.objects.create(name='Сталкер', year=1979)
+        url = '/api/v1/titles/'
+        for ordering, values in (
+                (['year', 'id'], ['abc', 1]),
+                (['-rating', '-id'], ['high', 1]),
+                (['name', 'id'], ['Сталкер', 'abc'])):
+            params = {
+                'ordering': ','.join(ordering),
+                'cursor': tampered_cursor(ordering, values)}
+            response = client.get(url, params)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что курсор `{url}?ordering='
+                f'{params["ordering"]}` со значениями {values} '
+                'возвращает ответ со статусом 404.'
+            )
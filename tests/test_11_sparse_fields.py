@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews, create_titles
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return response.json(), [query['sql'] for query in context]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11SparseFields:
+
+    def test_01_title_fields(self, client, admin_client):
+        create_titles(admin_client)
+        url = '/api/v1/titles/?fields=id,name,rating'
+        data, queries = get_with_queries(client, url)
+        for title in data['results']:
+            assert set(title) == {'id', 'name', 'rating'}, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает только '
+                'запрошенные поля.'
+            )
+        assert not any('"description"' in sql for sql in queries), (
+            f'Проверьте, что при GET-запросе к `{url}` описание не '
+            'загружается из БД.'
+        )
+        assert not any('reviews_genre' in sql or 'reviews_category' in sql
+                       for sql in queries), (
+            f'Проверьте, что при GET-запросе к `{url}` жанры и категории '
+            'не загружаются из БД.'
+        )
+
+        url = '/api/v1/titles/?omit=description,genre'
+        data, _ = get_with_queries(client, url)
+        for title in data['results']:
+            assert set(title) == {'id', 'name', 'year', 'rating',
+                                  'category'}, (
+                f'Проверьте, что GET-запрос к `{url}` не возвращает '
+                'исключённые поля.'
+            )
+
+    def test_02_review_and_reference_fields(self, client, admin_client,
+                                            admin, user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?fields=id,score'
+        data, queries = get_with_queries(client, url)
+        assert all(set(review) == {'id', 'score'}
+                   for review in data['results'])
+        assert not any('users_user' in sql for sql in queries), (
+            f'Проверьте, что при GET-запросе к `{url}` авторы не '
+            'загружаются из БД.'
+        )
+
+        for url in ('/api/v1/categories/?fields=slug',
+                    '/api/v1/genres/?fields=slug'):
+            data, _ = get_with_queries(client, url)
+            assert all(set(item) == {'slug'} for item in data['results']), (
+                f'Проверьте, что GET-запрос к `{url}` возвращает только '
+                'запрошенные поля.'
+            )
+
+        response = admin_client.get('/api/v1/users/?omit=bio,role')
+        assert all('bio' not in item and 'role' not in item
+                   for item in response.json()['results'])
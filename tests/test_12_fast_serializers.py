@@ -0,0 +1,45 @@
+import pytest
+from django.core.management import call_command
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleSerializer,)
+from reviews.models import Comment, Review, Title
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12FastSerializers:
+
+    def test_01_same_json(self, admin_client, admin, user, user_client):
+        create_comments(admin_client, {admin: admin_client, user: user_client})
+        Title.objects.filter(pk=Title.objects.last().pk).update(
+            category=None)
+        renderer = JSONRenderer()
+        cases = (
+            (TitleSerializer, Title.objects.all(), ''),
+            (TitleSerializer, Title.objects.all(), '?omit=genre,rating'),
+            (ReviewSerializer, Review.objects.all(), ''),
+            (CommentSerializer, Comment.objects.all(), '?fields=id,author'),
+        )
+        for serializer_class, queryset, query in cases:
+            request = Request(APIRequestFactory().get(f'/{query}'))
+            context = {'request': request}
+            standard = serializers.ListSerializer(
+                queryset, child=serializer_class(context=context)).data
+            fast = serializer_class(queryset, many=True, context=context).data
+            assert renderer.render(fast) == renderer.render(standard), (
+                f'Проверьте, что быстрая сериализация `{serializer_class}` '
+                'даёт тот же JSON, что и обычная.'
+            )
+
+    def test_02_benchmark_command(self):
+        call_command('bench_serializers', rows=3, repeat=1)
+        assert not Title.objects.exists(), (
+            'Проверьте, что бенчмарк не оставляет данных в БД.'
+        )
@@ -0,0 +1,56 @@
+import datetime
+import io
+from collections import OrderedDict
+from decimal import Decimal
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+
+class Test13FastJSON:
+
+    def test_01_renderer_matches_stdlib(self):
+        data = OrderedDict([
+            ('pub_date', datetime.datetime(
+                2023, 7, 13, 8, 7, 1, 123456, tzinfo=datetime.timezone.utc)),
+            ('day', datetime.date(2023, 7, 13)),
+            ('price', Decimal('9.50')),
+            ('message', gettext_lazy('Это имя нельзя использовать.')),
+            ('text', 'Строка\u2028с разделителем'),
+            ('scores', {1: 0, 10: 2}),
+            ('results', [{'rating': None, 'mean': 6.333333333333333}]),
+        ])
+        expected = JSONRenderer().render(data)
+        assert FastJSONRenderer().render(data) == expected, (
+            'Проверьте, что FastJSONRenderer выдаёт тот же JSON, '
+            'что и JSONRenderer.'
+        )
+        assert FastJSONRenderer().render(
+            data, 'application/json; indent=4') == JSONRenderer().render(
+            data, 'application/json; indent=4')
+
+    def test_02_parser(self):
+        body = '{"text": "Отзыв", "score": 7}'.encode()
+        assert FastJSONParser().parse(io.BytesIO(body)) == (
+            JSONParser().parse(io.BytesIO(body)))
+        for invalid in (b'{"score": NaN}', b'{"score": '):
+            with pytest.raises(ParseError):
+                FastJSONParser().parse(io.BytesIO(invalid))
+
+    def test_03_special_floats(self):
+        data = {'results': [{'mean': 1e16}, {'mean': 1e-05},
+                            {'mean': -2.5e300}, {'mean': 0.0}]}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(
+            data), (
+            'Проверьте, что FastJSONRenderer записывает большие и малые '
+            'числа так же, как JSONRenderer.'
+        )
+        for value in (float('nan'), float('inf'), -float('inf')):
+            with pytest.raises(ValueError):
+                FastJSONRenderer().render({'results': [{'mean': value}]})
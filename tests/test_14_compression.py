@@ -0,0 +1,100 @@
+import gzip
+import zlib
+
+import pytest
+import zstandard
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from api.middleware import CompressionMiddleware, negotiate_encoding
+from reviews.models import Title
+
+DESCRIPTION = 'Фильм о том, как машины восстали против людей. ' * 20
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Compression:
+
+    def test_01_gzip_title_list(self, client):
+        Title.objects.create(name='Терминатор', year=1984,
+                             description=DESCRIPTION)
+        url = '/api/v1/titles/'
+        plain = client.get(url)
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert response['Content-Encoding'] == 'gzip', (
+            f'Проверьте, что ответ на GET-запрос к `{url}` сжимается, '
+            'если клиент поддерживает gzip.'
+        )
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(response.content) == plain.content
+
+    def test_02_negotiation(self):
+        assert negotiate_encoding('gzip;q=0.5, deflate') == 'deflate'
+        assert negotiate_encoding('gzip;q=0, *;q=0.1') != 'gzip'
+        assert negotiate_encoding('identity') is None
+        assert negotiate_encoding('') is None
+
+    def test_03_threshold_and_content_type(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        middleware = CompressionMiddleware(lambda request: None)
+
+        response = middleware.process_response(
+            request, HttpResponse(b'{}', content_type='application/json'))
+        assert not response.has_header('Content-Encoding'), (
+            'Проверьте, что короткие ответы не сжимаются.'
+        )
+        response = middleware.process_response(
+            request, HttpResponse(b'\0' * 1000, content_type='image/png'))
+        assert not response.has_header('Content-Encoding'), (
+            'Проверьте, что сжимаются только разрешённые типы содержимого.'
+        )
+
+    def test_04_streaming(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='deflate')
+        middleware = CompressionMiddleware(lambda request: None)
+        chunks = [DESCRIPTION.encode()] * 3
+        response = middleware.process_response(
+            request, StreamingHttpResponse(
+                iter(chunks), content_type='text/plain'))
+        assert response['Content-Encoding'] == 'deflate'
+        decompressor = zlib.decompressobj()
+        stream = iter(response.streaming_content)
+        assert decompressor.decompress(next(stream)) == chunks[0], (
+            'Проверьте, что потоковый ответ сжимается по частям, '
+            'без буферизации всего содержимого.'
+        )
+        rest = b''.join(decompressor.decompress(part) for part in stream)
+        assert rest == b''.join(chunks[1:])
+
+    def test_05_zstd(self, client):
+        assert negotiate_encoding('gzip, deflate, br, zstd') == 'zstd', (
+            'Проверьте, что при равных q выбирается более быстрый zstd.'
+        )
+        assert negotiate_encoding('zstd;q=0.5, gzip') == 'gzip'
+        Title.objects.create(name='Терминатор', year=1984,
+                             description=DESCRIPTION)
+        url = '/api/v1/titles/'
+        plain = client.get(url)
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, zstd')
+        assert response['Content-Encoding'] == 'zstd', (
+            f'Проверьте, что ответ на GET-запрос к `{url}` сжимается zstd, '
+            'если клиент его поддерживает.'
+        )
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        assert decompressor.decompress(response.content) == plain.content
+
+    def test_06_zstd_streaming(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='zstd')
+        middleware = CompressionMiddleware(lambda request: None)
+        chunks = [DESCRIPTION.encode()] * 3
+        response = middleware.process_response(
+            request, StreamingHttpResponse(
+                iter(chunks), content_type='text/plain'))
+        assert response['Content-Encoding'] == 'zstd'
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        stream = iter(response.streaming_content)
+        assert decompressor.decompress(next(stream)) == chunks[0], (
+            'Проверьте, что потоковый ответ сжимается zstd по частям.'
+        )
+        rest = b''.join(decompressor.decompress(part) for part in stream)
+        assert rest == b''.join(chunks[1:])
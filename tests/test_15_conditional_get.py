@@ -0,0 +1,193 @@
+from contextlib import suppress
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import (
+    bump_versions, get_versions, model_scope, object_scope)
+from reviews.models import Category, Comment, Review, Title
+
+
+def revalidate(client, url, etag):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ConditionalGet:
+
+    def test_01_title_detail(self, client, user, user_client):
+        title = Title.objects.create(name='Солярис', year=1972)
+        url = f'/api/v1/titles/{title.id}/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response.get('ETag')
+        assert etag and response.has_header('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+
+        response, queries = revalidate(client, url, etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает статус 304.'
+        )
+        assert queries == 0, (
+            'Проверьте, что ответ 304 отдаётся без запросов к БД.'
+        )
+        assert response['ETag'] == etag
+
+        other = Title.objects.create(name='Сталкер', year=1979)
+        Review.objects.create(
+            title=other, author=user, text='Шедевр', score=10)
+        response, _ = revalidate(client, url, etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что отзыв к другому произведению не меняет '
+            '`ETag` страницы произведения.'
+        )
+
+        user_client.post(
+            f'{url}reviews/', data={'text': 'Красиво', 'score': 9})
+        response, _ = revalidate(client, url, etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв меняет `ETag` страницы '
+            'произведения.'
+        )
+        assert response.json()['rating'] == 9
+
+    def test_02_nested_lists(self, client, user):
+        title = Title.objects.create(name='Солярис', year=1972)
+        review = Review.objects.create(
+            title=title, author=user, text='Красиво', score=9)
+        for url, write in (
+            (f'/api/v1/titles/{title.id}/reviews/', review.save),
+            (f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+             lambda: Comment.objects.create(
+                 review=review, author=user, text='Согласен')),
+        ):
+            etag = client.get(url)['ETag']
+            response, queries = revalidate(client, url, etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED
+            assert queries == 0
+            write()
+            response, _ = revalidate(client, url, etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что запись в `{url}` меняет `ETag` списка.'
+            )
+
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что `ETag` учитывает адрес запроса.'
+        )
+
+    def test_03_if_modified_since(self, client):
+        url = '/api/v1/categories/'
+        response = client.get(url)
+        last_modified = response['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с `If-Modified-Since` '
+            'не раньше `Last-Modified` возвращает статус 304.'
+        )
+        etag = response['ETag']
+        Category.objects.create(name='Фильм', slug='films')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 1
+
+    def test_04_version_changes_after_commit(self, client, user):
+        title = Title.objects.create(name='Солярис', year=1972)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        scopes = (object_scope(Title, title.id), model_scope(Review))
+        etag = client.get(url)['ETag']
+        before = get_versions(*scopes)
+        with transaction.atomic():
+            review = Review.objects.create(
+                title=title, author=user, text='Шедевр', score=10)
+            assert get_versions(*scopes) == before, (
+                'Проверьте, что версия меняется только после фиксации '
+                'транзакции, иначе данные до записи закэшируются '
+                'под новой версией.'
+            )
+        assert get_versions(*scopes) != before
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 1
+        before = get_versions(*scopes)
+        with transaction.atomic():
+            title.delete()
+            assert get_versions(*scopes) == before, (
+                'Проверьте, что каскадное удаление меняет версию только '
+                'после фиксации.'
+            )
+        assert all(
+            new != old for new, old in zip(get_versions(*scopes), before))
+        assert not Review.objects.filter(pk=review.pk).exists()
+
+    def test_05_only_username_changes_author_lists(self, client, user):
+        title = Title.objects.create(name='Солярис', year=1972)
+        review = Review.objects.create(
+            title=title, author=user, text='Красиво', score=9)
+        Comment.objects.create(review=review, author=user, text='Согласен')
+        urls = (
+            f'/api/v1/titles/{title.id}/reviews/?count=cached',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            '?count=cached',
+        )
+        etags = [client.get(url)['ETag'] for url in urls]
+        user.confirmation_code = '123456'
+        user.save()
+        user.refresh_from_db()
+        user.bio = 'Читатель'
+        user.save(update_fields=['bio'])
+        for url, etag in zip(urls, etags):
+            response, queries = revalidate(client, url, etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что сохранение пользователя без смены имени '
+                f'не меняет `ETag` `{url}`.'
+            )
+            assert queries == 0
+            with CaptureQueriesContext(connection) as context:
+                client.get(url)
+            assert not any(
+                'COUNT(' in query['sql']
+                for query in context.captured_queries), (
+                f'Проверьте, что кэшированное количество `{url}` '
+                'не сбрасывается сохранением пользователя.'
+            )
+        user.username = 'renamed'
+        user.save()
+        for url, etag in zip(urls, etags):
+            response, _ = revalidate(client, url, etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что смена имени автора меняет `ETag` `{url}`.'
+            )
+            assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_06_one_bump_per_transaction(self, user, admin):
+        title = Title.objects.create(name='Солярис', year=1972)
+        with mock.patch(
+                'api.signals.bump_versions', wraps=bump_versions) as bump:
+            with transaction.atomic():
+                # Колбэк первой записи отбрасывается вместе с точкой
+                # сохранения, но её области всё равно должны смениться.
+                with suppress(RuntimeError), transaction.atomic():
+                    Review.objects.create(
+                        title=title, author=user, text='Черновик', score=1)
+                    raise RuntimeError
+                for author in (user, admin):
+                    Review.objects.create(
+                        title=title, author=author, text='Шедевр', score=10)
+                assert not bump.called
+        scopes = [scope for call in bump.call_args_list for scope in call.args]
+        assert bump.call_count == 1 and len(scopes) == len(set(scopes)), (
+            'Проверьте, что за транзакцию каждая версия меняется один раз '
+            'одной пакетной записью.'
+        )
+        assert {model_scope(Review), object_scope(Title, title.id)} <= set(
+            scopes)
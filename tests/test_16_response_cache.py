@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Genre, Title
+
+
+def get_cached(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ResponseCache:
+
+    def test_01_reference_lists(self, client, admin_client):
+        for url, data in (
+            ('/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'}),
+            ('/api/v1/categories/', {'name': 'Фильм', 'slug': 'films'}),
+        ):
+            response, _ = get_cached(client, url)
+            assert response['X-Cache'] == 'MISS'
+            response, queries = get_cached(client, url)
+            assert response['X-Cache'] == 'HIT' and queries == 0, (
+                f'Проверьте, что повторный GET-запрос к `{url}` '
+                'отдаётся из кэша без запросов к БД.'
+            )
+
+            admin_client.post(url, data=data)
+            response, _ = get_cached(client, url)
+            assert response['X-Cache'] == 'MISS', (
+                f'Проверьте, что POST-запрос к `{url}` сбрасывает кэш.'
+            )
+            assert response.json()['count'] == 1
+
+            admin_client.delete(f'{url}{data["slug"]}/')
+            response, _ = get_cached(client, url)
+            assert response.json()['count'] == 0, (
+                f'Проверьте, что DELETE-запрос к `{url}` сбрасывает кэш.'
+            )
+
+    def test_02_anonymous_titles(self, client, admin_client):
+        title = Title.objects.create(name='Солярис', year=1972)
+        url = f'/api/v1/titles/{title.id}/'
+        get_cached(client, url)
+        response, _ = get_cached(client, url)
+        assert response['X-Cache'] == 'HIT'
+
+        response, _ = get_cached(admin_client, url)
+        assert not response.has_header('X-Cache'), (
+            'Проверьте, что ответы авторизованным пользователям '
+            'не кэшируются.'
+        )
+
+        admin_client.patch(url, data={'name': 'Сталкер'})
+        response, _ = get_cached(client, url)
+        assert response.json()['name'] == 'Сталкер', (
+            'Проверьте, что изменение произведения сбрасывает кэш.'
+        )
+        Genre.objects.create(name='Драма', slug='drama')
+        response, _ = get_cached(client, '/api/v1/titles/?page=1')
+        assert response['X-Cache'] == 'MISS'
+
+    def test_03_stats(self, client, admin_client, user_client):
+        url = '/api/v1/cache/stats/'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+        for _ in range(4):
+            client.get('/api/v1/genres/')
+        stats = admin_client.get(url).json()
+        assert stats['genres'] == {
+            'hits': 3, 'misses': 1, 'hit_rate': 0.75}, (
+            f'Проверьте, что `{url}` возвращает долю попаданий в кэш.'
+        )
+        assert stats['categories']['hit_rate'] is None
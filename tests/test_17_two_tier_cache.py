@@ -0,0 +1,158 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+
+from api.cache import EventCounters, count_event, get_hit_stats
+from api.cache_backends import TwoTierCache
+
+
+def make_worker(location, **options):
+    options = {
+        'LOCAL_MAX_ENTRIES': 3,
+        'LOCAL_TIMEOUT': 60,
+        'LOCAL_TIMEOUTS': {'version:': 0},
+        **options,
+    }
+    return TwoTierCache(str(location), {'OPTIONS': options})
+
+
+class Test17TwoTierCache:
+
+    def test_01_local_hits_skip_shared(self, tmp_path):
+        worker = make_worker(tmp_path)
+        worker.set('genres', ['drama'])
+        worker.shared.clear()
+        assert worker.get('genres') == ['drama'], (
+            'Проверьте, что повторное чтение обслуживается локальным слоем.'
+        )
+        worker.get('genres').append('comedy')
+        assert worker.get('genres') == ['drama'], (
+            'Проверьте, что изменение прочитанного значения '
+            'не меняет локальную копию.'
+        )
+
+    def test_02_shared_between_workers(self, tmp_path):
+        first, second = make_worker(tmp_path), make_worker(tmp_path)
+        first.set('version:reviews_genre', 'a', timeout=None)
+        first.set('response:genres', ['drama'])
+        assert second.get('version:reviews_genre') == 'a'
+        assert second.get_many(['response:genres', 'unknown']) == {
+            'response:genres': ['drama']}
+
+        first.set('version:reviews_genre', 'b', timeout=None)
+        assert second.get('version:reviews_genre') == 'b', (
+            'Проверьте, что ключи версий не кэшируются локально и '
+            'изменение в одном воркере сразу видно в другом.'
+        )
+        assert second.add('lock:genres', 1) is True
+        assert first.add('lock:genres', 1) is False
+
+    def test_03_lru_and_ttl(self, tmp_path):
+        worker = make_worker(tmp_path, LOCAL_TIMEOUTS={'short:': 0.05})
+        for key in ('a', 'b', 'c'):
+            worker.set(key, key)
+        worker.get('a')
+        worker.set('d', 'd')
+        assert list(worker._local) == [
+            worker.make_key(key) for key in ('c', 'a', 'd')], (
+            'Проверьте, что локальный слой ограничен по размеру и '
+            'вытесняет давно не читанные ключи.'
+        )
+        worker.set('short:key', 1)
+        worker.shared.delete('short:key')
+        assert worker.get('short:key') == 1
+        time.sleep(0.1)
+        assert worker.get('short:key') is None, (
+            'Проверьте, что локальная копия устаревает по сроку.'
+        )
+
+    def test_04_delete_and_incr(self, tmp_path):
+        first, second = make_worker(tmp_path), make_worker(tmp_path)
+        first.set('counter', 1)
+        assert first.incr('counter') == 2
+        assert first.get('counter') == 2
+        first.delete('counter')
+        assert first.get('counter') is None
+        assert second.get('counter') is None
+
+    def test_05_atomic_add(self, tmp_path):
+        workers = [make_worker(tmp_path) for _ in range(16)]
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda w=worker: results.append(w.add('lock:x', 1)))
+            for worker in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results.count(True) == 1, (
+            'Проверьте, что из одновременных add успешен только один.'
+        )
+
+    def test_06_atomic_incr(self, tmp_path):
+        workers = [make_worker(tmp_path) for _ in range(8)]
+        workers[0].set('stats:x', 0, timeout=None)
+
+        def increment(worker):
+            for _ in range(25):
+                worker.incr('stats:x')
+
+        threads = [
+            threading.Thread(target=increment, args=(worker,))
+            for worker in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert workers[0].shared.get('stats:x') == 200, (
+            'Проверьте, что одновременные incr разных воркеров '
+            'не теряют увеличения.'
+        )
+
+    def test_07_concurrent_hit_counters(self):
+        threads = [
+            threading.Thread(target=lambda: [
+                count_event('titles', 'hits') for _ in range(10)])
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert get_hit_stats(['titles'])['titles']['hits'] == 80, (
+            'Проверьте, что счётчики попаданий не теряют события '
+            'при одновременной записи.'
+        )
+
+    def test_08_hit_counters_batched(self):
+        counters = EventCounters(flush_events=5, flush_interval=60)
+        with mock.patch.object(cache, 'incr', wraps=cache.incr) as incr:
+            for _ in range(4):
+                counters.add('stats:titles:hits')
+            assert cache.get('stats:titles:hits') is None, (
+                'Проверьте, что событие не записывается в общий кэш '
+                'сразу.'
+            )
+            counters.add('stats:titles:hits')
+            assert cache.get('stats:titles:hits') == 5, (
+                'Проверьте, что накопленные события переносятся '
+                'в общий кэш пачкой.'
+            )
+            counters.add('stats:titles:misses')
+            counters.flush()
+        assert cache.get('stats:titles:misses') == 1
+        assert incr.call_count <= 2, (
+            'Проверьте, что пачка событий записывается одним incr '
+            'на ключ.'
+        )
+        counters = EventCounters(flush_events=100, flush_interval=0)
+        counters.add('stats:titles:hits')
+        assert cache.get('stats:titles:hits') == 6, (
+            'Проверьте, что события переносятся в общий кэш '
+            'по истечении интервала.'
+        )
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+from api.cache import (
+    LOCK_KEY,
+    acquire_lock,
+    get_or_compute,
+    jittered,
+    should_refresh,)
+
+
+class Counter:
+
+    def __init__(self, value='data', delay=0.0):
+        self.calls = 0
+        self.value = value
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.value
+
+
+class Test18Stampede:
+
+    def test_01_single_flight(self):
+        compute = Counter(delay=0.3)
+        results = []
+
+        def worker():
+            results.append(get_or_compute('response:hot', compute, 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert compute.calls == 1, (
+            'Проверьте, что при одновременных промахах значение '
+            'пересчитывает только один вызывающий.'
+        )
+        assert [value for value, _ in results] == ['data'] * 8
+        assert sorted(state for _, state in results) == (
+            ['hit'] * 7 + ['miss'])
+
+    def test_02_stale_while_refreshing(self):
+        get_or_compute('response:hot', Counter('old'), 60)
+        envelope = cache.get('response:hot')
+        envelope['expires'] = time.time() - 1
+        cache.set('response:hot', envelope)
+
+        token = acquire_lock('response:hot')
+        assert token is not None
+        compute = Counter('new')
+        assert get_or_compute('response:hot', compute, 60) == (
+            'old', 'stale'), (
+            'Проверьте, что пока запись пересчитывается, остальные '
+            'получают прежнее значение.'
+        )
+        assert compute.calls == 0
+
+        cache.delete(LOCK_KEY.format('response:hot'))
+        assert get_or_compute('response:hot', compute, 60) == (
+            'new', 'refresh')
+        assert get_or_compute('response:hot', compute, 60) == ('new', 'hit')
+        assert cache.get(LOCK_KEY.format('response:hot')) is None
+
+    def test_03_uncacheable_value(self):
+        compute = Counter(None)
+        assert get_or_compute('response:missing', compute, 60) == (
+            None, 'miss')
+        get_or_compute('response:missing', compute, 60)
+        assert compute.calls == 2
+
+    def test_04_jitter_and_early_refresh(self):
+        timeouts = {jittered(100) for _ in range(20)}
+        assert len(timeouts) > 1 and all(
+            90 <= timeout <= 110 for timeout in timeouts), (
+            'Проверьте, что срок жизни записи получает случайный разброс.'
+        )
+        now = time.time()
+        slow = {'delta': 1000.0, 'expires': now + 1}
+        fast = {'delta': 0.0, 'expires': now + 1}
+        assert any(should_refresh(slow, now) for _ in range(20))
+        assert not any(should_refresh(fast, now) for _ in range(20))
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import mark_missing, object_scope
+from reviews.models import Review, Title
+
+
+def get_not_found(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        f'Проверьте, что GET-запрос к `{url}` с несуществующим id '
+        'возвращает статус 404.'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19NegativeCache:
+
+    def test_01_missing_title(self, client):
+        url = '/api/v1/titles/100/reviews/'
+        get_not_found(client, url)
+        assert get_not_found(client, url) == 0, (
+            f'Проверьте, что повторный GET-запрос к `{url}` с '
+            'несуществующим id не обращается к БД.'
+        )
+        Title.objects.create(id=100, name='Солярис', year=1972)
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что создание объекта сбрасывает кэш отсутствия.'
+        )
+
+    def test_02_missing_review(self, client, user):
+        title = Title.objects.create(name='Солярис', year=1972)
+        other = Title.objects.create(name='Сталкер', year=1979)
+        review = Review.objects.create(
+            title=other, author=user, text='Шедевр', score=10)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        get_not_found(client, url)
+        assert get_not_found(client, url) == 0
+        assert client.get(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что отсутствие отзыва кэшируется только для '
+            'пары произведения и отзыва из URL.'
+        )
+
+        review.title = title
+        review.save()
+        assert client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что перенос отзыва сбрасывает кэш отсутствия.'
+        )
+
+    def test_03_forget_after_commit(self, client):
+        url = '/api/v1/titles/200/reviews/'
+        get_not_found(client, url)
+        with transaction.atomic():
+            Title.objects.create(id=200, name='Солярис', year=1972)
+            # Параллельный запрос до фиксации ещё не видит произведение.
+            mark_missing(object_scope(Title, 200))
+        assert client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что кэш отсутствия сбрасывается после фиксации '
+            'транзакции, а не до неё.'
+        )
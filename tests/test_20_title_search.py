@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from reviews.search import TITLE_INDEX
+
+
+def search(client, query, **params):
+    response = client.get('/api/v1/titles/', {'search': query, **params})
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20TitleSearch:
+
+    def test_01_ranking_and_case(self, client):
+        Title.objects.create(
+            name='Ёжик в тумане', year=1975,
+            description='Мультфильм о дружбе.')
+        Title.objects.create(
+            name='Сказка сказок', year=1979,
+            description='Про волчка, ёжика и других.')
+        Title.objects.create(name='Солярис', year=1972)
+        assert search(client, 'ЕЖИК') == [
+            'Ёжик в тумане', 'Сказка сказок'], (
+            'Проверьте, что поиск не зависит от регистра и `ё`, а '
+            'совпадение в названии выше совпадения в описании.'
+        )
+        assert search(client, 'сол') == ['Солярис'], (
+            'Проверьте, что слово запроса ищется как префикс.'
+        )
+        assert search(client, 'ежик туман') == ['Ёжик в тумане']
+        assert search(client, 'ежик', ordering='-year') == [
+            'Сказка сказок', 'Ёжик в тумане']
+        assert search(client, '!!!') == []
+
+    def test_02_index_follows_writes(self, client, admin_client):
+        title = Title.objects.create(name='Солярис', year=1972)
+        response = admin_client.patch(
+            f'/api/v1/titles/{title.id}/', data={'name': 'Сталкер'})
+        assert response.status_code == HTTPStatus.OK
+        assert search(client, 'солярис') == []
+        assert search(client, 'сталкер') == ['Сталкер'], (
+            'Проверьте, что индекс обновляется при изменении '
+            'произведения.'
+        )
+        title.delete()
+        assert search(client, 'сталкер') == []
+
+    def test_03_uses_index(self, client):
+        Title.objects.create(name='Солярис', year=1972)
+        with CaptureQueriesContext(connection) as context:
+            search(client, 'солярис', count='false')
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'MATCH' in sql and 'LIKE' not in sql, (
+            'Проверьте, что `?search=` использует полнотекстовый индекс.'
+        )
+
+    def test_04_postgres_query_in_subquery(self):
+        matched = TITLE_INDEX.search_postgres(Title.objects.all(), ['сол'])
+        links = Title.genre.through.objects.filter(
+            title_id__in=matched.values('pk'))
+        sql = str(links.query)
+        assert 'U0."name"' in sql and '"reviews_title"."name"' not in sql, (
+            'Проверьте, что запрос PostgreSQL ссылается на столбцы через '
+            'псевдоним таблицы и работает во вложенном запросе.'
+        )
@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.autocomplete import AUTOCOMPLETE
+from api.cache import get_versions
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/autocomplete/'
+
+
+def suggest(client, query, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(URL, {'q': query, **params})
+    assert response.status_code == HTTPStatus.OK
+    return response.json(), len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Autocomplete:
+
+    def test_01_prefixes(self, client):
+        Title.objects.create(name='Ёжик в тумане', year=1975)
+        Title.objects.create(name='Сказка о ежике', year=1979)
+        Genre.objects.create(name='Драма', slug='drama')
+        Category.objects.create(name='Детская книга', slug='kids-books')
+        suggest(client, 'е')
+
+        result, queries = suggest(client, 'ЕЖИ')
+        assert [item['name'] for item in result] == [
+            'Ёжик в тумане', 'Сказка о ежике'], (
+            'Проверьте, что подсказки не зависят от регистра и `ё`, '
+            'а совпадения с начала названия идут первыми.'
+        )
+        assert queries == 0, (
+            f'Проверьте, что GET-запрос к `{URL}` не обращается к БД.'
+        )
+        result, _ = suggest(client, 'д')
+        assert {(item['type'], item['id']) for item in result} == {
+            ('genre', 'drama'), ('category', 'kids-books')}
+        result, _ = suggest(client, 'д', type='genre')
+        assert result == [{'type': 'genre', 'id': 'drama', 'name': 'Драма'}]
+        result, _ = suggest(client, 'е', limit=1)
+        assert len(result) == 1
+        assert suggest(client, '  ')[0] == []
+
+    def test_02_incremental_updates(self, client, admin_client):
+        title = Title.objects.create(name='Солярис', year=1972)
+        suggest(client, 'с')
+        response = admin_client.patch(
+            f'/api/v1/titles/{title.id}/', data={'name': 'Сталкер'})
+        assert response.status_code == HTTPStatus.OK
+        result, queries = suggest(client, 'с')
+        assert [item['name'] for item in result] == ['Сталкер'], (
+            'Проверьте, что индекс обновляется при изменении названия.'
+        )
+        assert queries == 0, (
+            'Проверьте, что запись в этом процессе не перестраивает '
+            'индекс из БД.'
+        )
+        title.delete()
+        assert suggest(client, 'с')[0] == []
+
+    def test_03_other_worker_writes(self, client):
+        suggest(client, 'с')
+        Title.objects.bulk_create([Title(name='Солярис', year=1972)])
+        AUTOCOMPLETE.invalidate()
+        result, queries = suggest(client, 'сол')
+        assert [item['name'] for item in result] == ['Солярис'], (
+            'Проверьте, что индекс перестраивается, когда названия '
+            'изменил другой воркер.'
+        )
+        assert queries > 0
+
+    def test_04_version_changes_after_commit(self, client):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        suggest(client, 'д')
+        before = get_versions(AUTOCOMPLETE.scope)
+        with transaction.atomic():
+            genre.delete()
+            assert get_versions(AUTOCOMPLETE.scope) == before, (
+                'Проверьте, что версия индекса меняется только после '
+                'фиксации, иначе другой воркер перестроит индекс по '
+                'старым строкам.'
+            )
+        assert get_versions(AUTOCOMPLETE.scope) != before
+        result, queries = suggest(client, 'д')
+        assert result == [] and queries == 0
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title, TitleTrigram
+from reviews.search import trigrams
+
+
+def fuzzy(client, query, **params):
+    response = client.get('/api/v1/titles/', {'fuzzy': query, **params})
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22FuzzySearch:
+
+    def test_01_typos(self, client):
+        Title.objects.create(name='Солярис', year=1972)
+        Title.objects.create(name='Сталкер', year=1979)
+        Title.objects.create(name='Ёжик в тумане', year=1975)
+        Title.objects.create(name='Terminator', year=1984)
+        assert fuzzy(client, 'салярис') == ['Солярис'], (
+            'Проверьте, что `?fuzzy=` находит название с опечаткой.'
+        )
+        assert fuzzy(client, 'ЕЖИК В ТУМАНЕ') == ['Ёжик в тумане'], (
+            'Проверьте, что нечёткий поиск не зависит от регистра и `ё`.'
+        )
+        assert fuzzy(client, 'terminater') == ['Terminator']
+        assert fuzzy(client, 'xyz') == []
+        assert fuzzy(client, '...') == []
+
+    def test_02_ranking(self, client):
+        Title.objects.create(name='Сталкер', year=1979)
+        Title.objects.create(name='Сталкер: Тень Чернобыля', year=2007)
+        assert fuzzy(client, 'сталкер') == [
+            'Сталкер', 'Сталкер: Тень Чернобыля'], (
+            'Проверьте, что результаты отсортированы по сходству.'
+        )
+        assert fuzzy(client, 'сталкер', ordering='-year') == [
+            'Сталкер: Тень Чернобыля', 'Сталкер']
+
+    def test_03_index_follows_writes(self, client, admin_client):
+        title = Title.objects.create(name='Солярис', year=1972)
+        assert set(title.trigrams.values_list('trigram', flat=True)) == (
+            trigrams('Солярис'))
+        admin_client.patch(
+            f'/api/v1/titles/{title.id}/', data={'name': 'Сталкер'})
+        assert fuzzy(client, 'солярис') == []
+        assert fuzzy(client, 'сталкир') == ['Сталкер'], (
+            'Проверьте, что триграммы обновляются при изменении названия.'
+        )
+        title.delete()
+        assert not TitleTrigram.objects.exists()
+
+    def test_04_uses_trigram_index(self, client):
+        Title.objects.create(name='Солярис', year=1972)
+        with CaptureQueriesContext(connection) as context:
+            fuzzy(client, 'салярис', count='false')
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'reviews_titletrigram' in sql and 'LIKE' not in sql
@@ -0,0 +1,124 @@
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+
+REVIEWS = '/api/v1/search/reviews/'
+COMMENTS = '/api/v1/search/comments/'
+
+
+def search(client, url, query, **params):
+    response = client.get(url, {'search': query, **params})
+    assert response.status_code == HTTPStatus.OK
+    return [item['text'] for item in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ReviewSearch:
+
+    def test_01_reviews(self, client, user, admin):
+        solaris = Title.objects.create(name='Солярис', year=1972)
+        stalker = Title.objects.create(name='Сталкер', year=1979)
+        Review.objects.create(
+            title=solaris, author=user, score=10,
+            text='Ёлки, какой океан! Океан живой.')
+        Review.objects.create(
+            title=stalker, author=user, score=9, text='Зона и океан тишины.')
+        Review.objects.create(
+            title=stalker, author=admin, score=8, text='Долго, но красиво.')
+        assert search(client, REVIEWS, 'ОКЕАН') == [
+            'Ёлки, какой океан! Океан живой.', 'Зона и океан тишины.'], (
+            'Проверьте, что поиск не зависит от регистра, '
+            'а результаты отсортированы по релевантности.'
+        )
+        assert search(client, REVIEWS, 'елки') == [
+            'Ёлки, какой океан! Океан живой.']
+        assert search(client, REVIEWS, 'океан', title=stalker.id) == [
+            'Зона и океан тишины.'], (
+            'Проверьте фильтр `?title=` в поиске по отзывам.'
+        )
+        assert search(client, REVIEWS, 'красиво', author=user.username) == []
+        assert search(client, REVIEWS, 'красиво', author=admin.username) == [
+            'Долго, но красиво.']
+        response = client.get(REVIEWS, {'search': 'океан'})
+        result = response.json()
+        assert result['count'] == 2
+        assert set(result['results'][0]) == {
+            'id', 'title', 'text', 'author', 'score', 'pub_date'}
+        assert result['results'][0]['title'] == solaris.id
+        assert result['results'][0]['author'] == user.username
+
+    def test_02_comments_and_dates(self, client, user):
+        solaris = Title.objects.create(name='Солярис', year=1972)
+        stalker = Title.objects.create(name='Сталкер', year=1979)
+        first = Review.objects.create(
+            title=solaris, author=user, score=10, text='Шедевр')
+        second = Review.objects.create(
+            title=stalker, author=user, score=9, text='Шедевр')
+        old = Comment.objects.create(
+            review=first, author=user, text='Согласен, океан прекрасен.')
+        Comment.objects.create(
+            review=second, author=user, text='Океан тут ни при чём.')
+        Comment.objects.filter(pk=old.pk).update(
+            pub_date=datetime(2000, 1, 1, tzinfo=timezone.utc))
+        assert len(search(client, COMMENTS, 'океан')) == 2
+        assert search(client, COMMENTS, 'океан', title=solaris.id) == [
+            'Согласен, океан прекрасен.'], (
+            'Проверьте фильтр `?title=` в поиске по комментариям.'
+        )
+        assert search(client, COMMENTS, 'океан', review=second.id) == [
+            'Океан тут ни при чём.']
+        assert search(
+            client, COMMENTS, 'океан', pub_date_before='2001-01-01') == [
+            'Согласен, океан прекрасен.'], (
+            'Проверьте фильтр по дате `?pub_date_before=`.'
+        )
+        assert search(
+            client, COMMENTS, 'океан', pub_date_after='2001-01-01') == [
+            'Океан тут ни при чём.']
+        item = client.get(
+            COMMENTS, {'search': 'согласен'}).json()['results'][0]
+        assert (item['title'], item['review']) == (solaris.id, first.id)
+
+    def test_03_index_follows_writes(self, client, user_client, user):
+        title = Title.objects.create(name='Солярис', year=1972)
+        review = Review.objects.create(
+            title=title, author=user, score=10, text='Шедевр')
+        comment = Comment.objects.create(
+            review=review, author=user, text='Согласен')
+        response = user_client.patch(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+            data={'text': 'Скучно'})
+        assert response.status_code == HTTPStatus.OK
+        assert search(client, REVIEWS, 'шедевр') == []
+        assert search(client, REVIEWS, 'скучно') == ['Скучно'], (
+            'Проверьте, что индекс обновляется при изменении отзыва.'
+        )
+        comment.text = 'Не согласен'
+        comment.save()
+        assert search(client, COMMENTS, 'не') == ['Не согласен']
+        comment.delete()
+        assert search(client, COMMENTS, 'согласен') == []
+        review.delete()
+        assert search(client, REVIEWS, 'скучно') == []
+
+    def test_04_required_and_indexed(self, client, user):
+        title = Title.objects.create(name='Солярис', year=1972)
+        Review.objects.create(
+            title=title, author=user, score=10, text='Шедевр')
+        response = client.get(REVIEWS)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что GET-запрос к `{REVIEWS}` без `?search=` '
+            'возвращает статус 400.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            search(client, REVIEWS, 'шедевр', count='false')
+            search(client, COMMENTS, 'шедевр', count='false')
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'MATCH' in sql and 'LIKE' not in sql, (
+            'Проверьте, что поиск использует полнотекстовый индекс.'
+        )
@@ -0,0 +1,126 @@
+import re
+from urllib.parse import urlencode
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+TABLE_SCAN = re.compile(r'^SCAN \w+$')
+
+
+def query_plans(client, url):
+    """Строки EXPLAIN QUERY PLAN всех SELECT-запросов к `url`."""
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    plans = {}
+    with connection.cursor() as cursor:
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+            plans[query['sql']] = [row[-1] for row in cursor.fetchall()]
+    return plans
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='План запроса в формате SQLite.')
+@pytest.mark.django_db(transaction=True)
+class Test24QueryPlans:
+
+    @pytest.fixture
+    def urls(self, user):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(
+            name='Солярис', year=1972, category=category)
+        title.genre.add(genre)
+        review = Review.objects.create(
+            title=title, author=user, text='Шедевр', score=10)
+        Comment.objects.create(review=review, author=user, text='Согласен')
+        return {
+            'titles': '/api/v1/titles/',
+            'year': '/api/v1/titles/?year=1972',
+            'category': '/api/v1/titles/?category=movie',
+            'genre': '/api/v1/titles/?genre=drama',
+            'reviews': f'/api/v1/titles/{title.id}/reviews/',
+            'comments': (
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'),
+        }
+
+    def test_01_no_table_scans(self, client, urls):
+        for url in urls.values():
+            for sql, plan in query_plans(client, url).items():
+                scans = [step for step in plan if TABLE_SCAN.match(step)]
+                assert not scans, (
+                    f'Проверьте, что запросы GET `{url}` используют индекс, '
+                    f'а не полный просмотр таблицы: {scans} в {sql}'
+                )
+
+    def test_02_filtered_titles_sorted_by_index(self, client, urls):
+        expected = {
+            'year': 'title_year_name_idx',
+            'category': 'title_category_name_idx',
+            'genre': 'title_genre_genre_title_idx',
+        }
+        for name, index in expected.items():
+            plans = query_plans(client, urls[name])
+            main = next(
+                plan for sql, plan in plans.items()
+                if 'ORDER BY "reviews_title"."name"' in sql)
+            assert any(index in step for step in main), (
+                f'Проверьте, что GET `{urls[name]}` использует индекс '
+                f'`{index}`: {main}'
+            )
+            if name != 'genre':
+                assert not any('TEMP B-TREE' in step for step in main), (
+                    f'Проверьте, что GET `{urls[name]}` сортирует '
+                    f'по индексу: {main}'
+                )
+
+    def test_03_search_ranked_in_one_pass(self, client):
+        Title.objects.bulk_create(
+            Title(name=f'Солярис {number}', year=1972)
+            for number in range(3000))
+        url = '/api/v1/titles/?' + urlencode({'search': 'солярис'})
+        main = next(
+            plan for sql, plan in query_plans(client, url).items()
+            if 'ORDER BY' in sql)
+        assert main[0].startswith('SCAN reviews_title_fts VIRTUAL TABLE'), (
+            f'Проверьте, что GET `{url}` начинает план с поиска по '
+            f'полнотекстовому индексу: {main}'
+        )
+        assert not any('CORRELATED' in step for step in main), (
+            f'Проверьте, что GET `{url}` считает релевантность за один '
+            f'проход, а не подзапросом на каждую найденную строку: {main}'
+        )
+
+    def test_04_text_search_ranked_in_one_pass(self, client, user):
+        Title.objects.bulk_create(
+            Title(name=f'Фильм {number}', year=1972)
+            for number in range(2000))
+        Review.objects.bulk_create(
+            Review(title=title, author=user, text='Океан и тишина', score=7)
+            for title in Title.objects.all())
+        review = Review.objects.first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=user, text='Океан живой')
+            for _ in range(2000))
+        for url, fts in (('/api/v1/search/reviews/', 'reviews_review_fts'),
+                         ('/api/v1/search/comments/', 'reviews_comment_fts')):
+            url += '?' + urlencode({'search': 'океан'})
+            main = next(
+                plan for sql, plan in query_plans(client, url).items()
+                if 'ORDER BY' in sql)
+            assert main[0].startswith(f'SCAN {fts} VIRTUAL TABLE'), (
+                f'Проверьте, что GET `{url}` начинает план с поиска по '
+                f'полнотекстовому индексу: {main}'
+            )
+            assert not any('CORRELATED' in step for step in main), (
+                f'Проверьте, что GET `{url}` считает релевантность за один '
+                f'проход, а не подзапросом на каждую найденную строку: '
+                f'{main}'
+            )
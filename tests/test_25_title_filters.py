@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+
+
+def titles(client, **params):
+    response = client.get('/api/v1/titles/', params)
+    assert response.status_code == HTTPStatus.OK
+    result = response.json()
+    names = [title['name'] for title in result['results']]
+    assert result['count'] == len(names), (
+        'Проверьте, что `count` совпадает с числом найденных произведений.'
+    )
+    return names
+
+
+@pytest.fixture
+def catalog():
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    music = Category.objects.create(name='Музыка', slug='music')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    scifi = Genre.objects.create(name='Фантастика', slug='sci-fi')
+    for name, year, category, genres in (
+            ('Гараж', 1979, movie, (drama, comedy)),
+            ('Кин-дза-дза!', 1986, movie, (comedy, scifi)),
+            ('Солярис', 1961, book, (drama, scifi)),
+            ('Сталкер', 1979, movie, (drama, scifi)),
+            ('Кино', 1988, music, ())):
+        title = Title.objects.create(name=name, year=year, category=category)
+        title.genre.set(genres)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TitleFilters:
+
+    def test_01_genre_any_all(self, client, catalog):
+        assert titles(client, genre='drama') == [
+            'Гараж', 'Солярис', 'Сталкер']
+        assert titles(client, genre='drama,comedy') == [
+            'Гараж', 'Кин-дза-дза!', 'Солярис', 'Сталкер'], (
+            'Проверьте, что `?genre=a,b` отбирает произведения хотя бы '
+            'с одним из жанров и не дублирует их.'
+        )
+        assert titles(client, genre='drama,sci-fi', genre_match='all') == [
+            'Солярис', 'Сталкер'], (
+            'Проверьте, что `?genre_match=all` требует все жанры.'
+        )
+        assert titles(
+            client, genre='drama,comedy,sci-fi', genre_match='all') == []
+        assert titles(client, genre='unknown') == []
+        response = client.get(
+            '/api/v1/titles/', {'genre': 'drama', 'genre_match': 'some'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_category_and_years(self, client, catalog):
+        assert titles(client, category='book,music') == ['Кино', 'Солярис']
+        assert titles(client, year_min=1979, year_max=1986) == [
+            'Гараж', 'Кин-дза-дза!', 'Сталкер']
+        assert titles(client, year_max=1970) == ['Солярис']
+        assert titles(
+            client, category='movie', genre='drama,sci-fi',
+            year_min=1980) == ['Кин-дза-дза!']
+
+    def test_03_no_join_on_genres(self, client, catalog):
+        with CaptureQueriesContext(connection) as context:
+            titles(client, genre='drama,comedy')
+        count_sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'COUNT(' in query['sql'])
+        assert 'JOIN "reviews_title_genre"' not in count_sql, (
+            'Проверьте, что фильтр по жанрам не соединяет произведения '
+            'с промежуточной таблицей.'
+        )
@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/titles/facets/'
+
+
+def facets(client, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(URL, params)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{URL}` возвращает статус 200.'
+    )
+    return response, len(context.captured_queries)
+
+
+@pytest.fixture
+def catalog():
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    scifi = Genre.objects.create(name='Фантастика', slug='sci-fi')
+    for name, year, category, genres in (
+            ('Гараж', 1979, movie, (drama,)),
+            ('Солярис', 1961, book, (drama, scifi)),
+            ('Сталкер', 1979, movie, (drama, scifi)),
+            ('Кин-дза-дза!', 1986, movie, (scifi,)),
+            ('Кино', 1988, None, ())):
+        title = Title.objects.create(name=name, year=year, category=category)
+        title.genre.set(genres)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Facets:
+
+    def test_01_counts(self, client, catalog):
+        response, _ = facets(client)
+        assert response.json() == {
+            'count': 5,
+            'genre': [
+                {'slug': 'drama', 'name': 'Драма', 'count': 3},
+                {'slug': 'sci-fi', 'name': 'Фантастика', 'count': 3},
+            ],
+            'category': [
+                {'slug': 'movie', 'name': 'Фильм', 'count': 3},
+                {'slug': 'book', 'name': 'Книга', 'count': 1},
+            ],
+            'year': [
+                {'year': 1961, 'count': 1},
+                {'year': 1979, 'count': 2},
+                {'year': 1986, 'count': 1},
+                {'year': 1988, 'count': 1},
+            ],
+            'decade': [
+                {'decade': 1960, 'count': 1},
+                {'decade': 1970, 'count': 2},
+                {'decade': 1980, 'count': 2},
+            ],
+        }, (
+            f'Проверьте, что `{URL}` возвращает число произведений '
+            'по жанрам, категориям, годам и десятилетиям.'
+        )
+
+    def test_02_filters(self, client, catalog):
+        result = facets(client, genre='sci-fi', year_min=1970)[0].json()
+        assert result['count'] == 2, (
+            f'Проверьте, что `{URL}` принимает параметры фильтрации '
+            'списка произведений.'
+        )
+        assert result['genre'] == [
+            {'slug': 'sci-fi', 'name': 'Фантастика', 'count': 2},
+            {'slug': 'drama', 'name': 'Драма', 'count': 1},
+        ]
+        assert result['category'] == [
+            {'slug': 'movie', 'name': 'Фильм', 'count': 2}]
+        assert facets(client, search='солярис')[0].json()['count'] == 1
+        response = client.get(URL, {'genre_match': 'some'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_cached(self, client, catalog):
+        response, queries = facets(client)
+        assert queries <= 3, (
+            f'Проверьте, что `{URL}` считает все разбиения '
+            'сгруппированными запросами.'
+        )
+        cached, queries = facets(client)
+        assert queries == 0 and cached['X-Cache'] == 'HIT', (
+            f'Проверьте, что ответ `{URL}` кэшируется.'
+        )
+        not_modified = client.get(
+            URL, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+        Title.objects.create(name='Зеркало', year=1975)
+        fresh, _ = facets(client)
+        assert fresh.json()['count'] == 6, (
+            'Проверьте, что изменение произведений сбрасывает кэш фасетов.'
+        )
+        assert fresh['ETag'] != response['ETag']